@@ -4,44 +4,188 @@ import csv
 import os
 import argparse
 from collections import Counter
-import statistics
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+from misc.csv_logger import CSV_HEADER
+from misc.move_log import (
+    MOVE_NAMES, MOVE_RECORD_DTYPE, HEADER_SIZE, move_name, is_move_log, read_move_log_header, export_csv
+)
+from misc.log_files import get_compression, is_log_file, open_log_stream
+from misc.log_summary import LogSummary, read_summary_sidecar, write_summary_sidecar, read_log_index
+
+# rows of a CSV log parsed before they are added to the accumulators at once
+CSV_BATCH_SIZE = 4096
+# bytes of a log read (after decompression) at a time
+LOG_READ_SIZE = 1 << 20
+CSV_COLUMNS = {name: index for index, name in enumerate(CSV_HEADER)}
+
+def summarize_log(filepath, use_sidecar=True, finish=True):
+    """
+    Summarize a binary or CSV move log (compressed or not).
+
+    The summary of what was read is saved in the log's sidecar, so the next call only
+    parses the records appended since (none if the log was closed and its sidecar
+    written by the logger). Only a chunk of the log is held in memory at a time.
+
+    Args:
+        filepath (str): Path of the log
+        use_sidecar (bool): Start from and update the saved summary
+        finish (bool): Record it as a whole game (finish_log), False for one part of a rotated log
+
+    Returns:
+        LogSummary: The summary, its seed is None if the log does not record it
+    """
+    summary = read_summary_sidecar(filepath) if use_sidecar else None
+    if summary is None or summary.offset is None:
+        summary = LogSummary(filename=os.path.basename(filepath))
+    previous_offset = summary.offset
+
+    if summary.offset != os.path.getsize(filepath):
+        _scan_log(filepath, summary)
+        if use_sidecar and summary.offset is not None and summary.offset != previous_offset:
+            try:
+                write_summary_sidecar(filepath, summary)
+            except OSError:
+                pass  # read-only log directory, the summary is just not kept
+    # sidecars written before seeds were normalized may still hold '[156]'
+    summary.seed = normalize_seed(summary.seed)
+    return summary.finish_log() if finish else summary
+
+def _scan_log(filepath, summary):
+    """
+    Add the records of a log after summary.offset (from the start if None) and move the offset on.
+
+    Uncompressed logs are read up to their last complete record. Compressed logs are read
+    frame by frame from the offset, which is always a frame boundary, the offset becomes
+    unknown if the last frame is torn or the file grows while it is read.
+    """
+    binary = is_move_log(filepath)
+    compression = get_compression(filepath)
+    start = summary.offset or 0
+    size = os.path.getsize(filepath)
+    clean = True
+    consumed = 0
+    pending = b''
+
+    with open(filepath, 'rb') as raw:
+        raw.seek(start)
+        file = raw if compression is None else open_log_stream(raw, compression)
+        if start == 0:
+            if binary:
+                seed = read_move_log_header(filepath, file)['seed']
+                summary.seed = str(seed) if seed is not None else None
+                consumed = HEADER_SIZE
+            else:
+                consumed = len(file.readline())
+
+        record_size = MOVE_RECORD_DTYPE.itemsize
+        while True:
+            try:
+                data = file.read1(LOG_READ_SIZE)
+            except EOFError:
+                clean = False
+                break
+            if not data:
+                break
+            pending += data
+            end = len(pending) // record_size * record_size if binary else pending.rfind(b'\n') + 1
+            if end:
+                if binary:
+                    _add_records(summary, np.frombuffer(pending[:end], dtype=MOVE_RECORD_DTYPE))
+                else:
+                    _add_csv_rows(summary, pending[:end])
+                consumed += end
+                pending = pending[end:]
+
+    if compression is None:
+        summary.offset = start + consumed
+    elif clean and not pending and os.path.getsize(filepath) == size:
+        summary.offset = size
+    else:
+        summary.offset = None
+
+def _add_records(summary, records):
+    move_type_counts = np.bincount(records['move_type'], minlength=len(MOVE_NAMES))
+    move_counts = Counter()
+    for move, count in enumerate(move_type_counts):
+        if count:
+            move_counts[move_name(move)] += int(count)
+    summary.update(move_counts, records['score'], records['game_time'], records['chosen_probability'])
+
+def _add_csv_rows(summary, data):
+    columns = CSV_COLUMNS
+    reader = csv.reader(data.decode('utf-8').splitlines())
+    while True:
+        rows = list(islice(reader, CSV_BATCH_SIZE))
+        if not rows:
+            break
+        values = list(zip(*rows))
+        if summary.seed is None:
+            summary.seed = normalize_seed(values[columns['seed']][0])
+        summary.update(Counter(values[columns['move_type']]),
+                       np.array([int(score) for score in values[columns['score']]]),
+                       np.array(values[columns['game_time']], dtype=np.float64),
+                       np.array(values[columns['chosen_probability']], dtype=np.float64))
+
+def normalize_seed(seed):
+    """
+    Seed as the text logs are grouped by, whatever form the log stored it in.
+
+    Older CSV logs wrote the seed as a list ('[156]'), newer ones as a number, both become '156'.
+
+    Returns:
+        str: The seed, None if it is unknown
+    """
+    if seed is None:
+        return None
+    seed = str(seed).strip().strip('[]').strip()
+    return None if seed in ('', 'unknown') else seed
+
+def summarize_logs(filepaths, jobs=None):
+    """
+    Summarize many logs in parallel, one log per task in a process pool.
+
+    The summaries are not finished, so the parts of a rotated game can be merged first.
+
+    Args:
+        filepaths (list): Log paths
+        jobs (int, optional): Worker processes, os.cpu_count() if None, 1 runs in this process
+
+    Returns:
+        list: (filepath, LogSummary or the exception raised reading it) for every log
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(filepaths) <= 1:
+        return [(filepath, _summarize_or_error(filepath)) for filepath in filepaths]
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(filepaths))) as pool:
+        chunksize = max(1, len(filepaths) // (jobs * 4))
+        return list(zip(filepaths, pool.map(_summarize_or_error, filepaths, chunksize=chunksize)))
+
+def _summarize_or_error(filepath):
+    try:
+        return summarize_log(filepath, finish=False)
+    except Exception as e:
+        return e
 
 def analyze_csv_log(filepath):
     if not os.path.exists(filepath):
         print(f"Error: File {filepath} not found")
         return
     
-    move_counts = Counter()
-    scores = []
-    game_times = []
-    probabilities_data = []
-    seed = None
-    
-    with open(filepath, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        
-        for row in reader:
-            if seed is None and 'seed' in row:
-                seed = row['seed']
-            
-            move_type = row['move_type']
-            move_counts[move_type] += 1
-            
-            score = int(row['score'])
-            scores.append(score)
-            
-            game_time = float(row['game_time'])
-            game_times.append(game_time)
-            
-            chosen_prob = float(row['chosen_probability'])
-            probabilities_data.append(chosen_prob)
+    summary = summarize_log(filepath)
+    seed, move_counts = summary.seed, summary.move_counts
+    if summary.total_moves == 0:
+        print(f"No moves logged in {filepath}")
+        return
     
     print(f"=== Analysis of {filepath} ===")
-    if seed:
+    if seed is not None:
         print(f"Game seed: {seed}")
     print(f"Total moves: {sum(move_counts.values())}")
-    print(f"Game duration: {max(game_times):.2f} seconds")
-    print(f"Final score: {max(scores)}")
+    print(f"Game duration: {summary.game_times.max:.2f} seconds")
+    print(f"Final score: {summary.scores.max}")
     print()
     
     print("Move distribution:")
@@ -50,109 +194,138 @@ def analyze_csv_log(filepath):
         print(f"  {move}: {count} ({percentage:.1f}%)")
     print()
     
+    probabilities = summary.chosen_probabilities
     print("Probability statistics:")
-    print(f"  Average chosen probability: {statistics.mean(probabilities_data):.4f}")
-    print(f"  Min chosen probability: {min(probabilities_data):.4f}")
-    print(f"  Max chosen probability: {max(probabilities_data):.4f}")
-    print(f"  Median chosen probability: {statistics.median(probabilities_data):.4f}")
+    print(f"  Average chosen probability: {probabilities.mean:.4f}")
+    print(f"  Min chosen probability: {probabilities.min:.4f}")
+    print(f"  Max chosen probability: {probabilities.max:.4f}")
+    print(f"  Median chosen probability: {summary.chosen_probability_sketch.quantile(0.5):.4f}")
     print()
 
-def list_log_files(directory="logs"):
+def list_log_files(directory="logs", run_id=None):
     if not os.path.exists(directory):
         print(f"Logs directory '{directory}' not found")
         return []
     
-    csv_files = [f for f in os.listdir(directory) if f.endswith('.csv')]
-    csv_files.sort(reverse=True)
+    return [filepath for filepath, _ in _indexed_logs(directory, run_id)]
+
+def _indexed_logs(directory, run_id=None):
+    """
+    (filepath, index entry) of every log in a directory, newest first.
+
+    Indexed logs come from index.jsonl, with the seed, run and game their logger recorded.
+    Older logs written before the index existed follow by name, with an empty entry.
+
+    Args:
+        directory (str): Log directory
+        run_id (str, optional): Only the logs of this run (indexed ones only)
+    """
+    index = read_log_index(directory) or {}
+    indexed = sorted(index.values(), key=lambda entry: entry['time'], reverse=True)
+    logs = [(os.path.join(directory, entry['filename']), entry) for entry in indexed
+            if (run_id is None or entry.get('run_id') == run_id)
+            and os.path.exists(os.path.join(directory, entry['filename']))]
+    if run_id is not None:
+        return logs
     
-    return [os.path.join(directory, f) for f in csv_files]
+    unindexed = [f for f in os.listdir(directory) if is_log_file(f) and f not in index]
+    unindexed.sort(reverse=True)
+    return logs + [(os.path.join(directory, f), {}) for f in unindexed]
 
-def compare_seeds(log_directory="logs"):
+def compare_seeds(log_directory="logs", jobs=None, run_id=None):
     if not os.path.exists(log_directory):
         print(f"Error: Directory {log_directory} not found")
         return
     
-    seed_data = {}
+    # logs the index does not cover record their seed themselves (binary header, CSV seed column)
+    entries = dict(_indexed_logs(log_directory, run_id))
     
-    for filename in os.listdir(log_directory):
-        if filename.endswith('.csv') and 'seed' in filename:
-            filepath = os.path.join(log_directory, filename)
-            
-            import re
-            seed_match = re.search(r'seed\[(\d+)\]', filename)
-            if not seed_match:
-                continue
-                
-            seed = seed_match.group(1)
-            
-            move_counts = Counter()
-            scores = []
-            game_times = []
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    
-                    for row in reader:
-                        move_type = row['move_type']
-                        move_counts[move_type] += 1
-                        
-                        score = int(row['score'])
-                        scores.append(score)
-                        
-                        game_time = float(row['game_time'])
-                        game_times.append(game_time)
-                
-                if scores and game_times:
-                    seed_data[seed] = {
-                        'final_score': max(scores),
-                        'game_duration': max(game_times),
-                        'total_moves': sum(move_counts.values()),
-                        'filename': filename
-                    }
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
-                continue
+    # parts of a rotated game are merged back into the game first
+    games = {}
+    for filepath, summary in summarize_logs(list(entries), jobs):
+        if isinstance(summary, Exception):
+            print(f"Error processing {os.path.basename(filepath)}: {summary}")
+            continue
+        entry = entries[filepath]
+        if entry.get('seed') is not None:
+            summary.seed = normalize_seed(entry['seed'])
+        game = entry.get('game', os.path.basename(filepath))
+        if game in games:
+            games[game].merge(summary)
+        else:
+            games[game] = summary
+    
+    # logs of the same seed (several games or runs) are merged into one entry
+    seed_data = {}
+    for summary in games.values():
+        seed = summary.seed
+        if seed is None or summary.total_moves == 0:
+            continue
+        summary.finish_log()
+        if seed in seed_data:
+            seed_data[seed].merge(summary)
+        else:
+            seed_data[seed] = summary
     
     if not seed_data:
         print("No seed-based log files found for comparison")
         return
     
     print("=== Seed Performance Comparison ===")
-    print(f"{'Seed':<8} {'Final Score':<12} {'Duration (s)':<12} {'Total Moves':<12} {'Score/Move':<12}")
-    print("-" * 60)
+    print(f"{'Seed':<8} {'Final Score':<12} {'Duration (s)':<12} {'Total Moves':<12} {'Score/Move':<12} {'Logs':<6}")
+    print("-" * 66)
     
-    sorted_seeds = sorted(seed_data.items(), key=lambda x: x[1]['final_score'], reverse=True)
+    sorted_seeds = sorted(seed_data.items(), key=lambda x: x[1].final_scores.max, reverse=True)
     
     for seed, data in sorted_seeds:
-        score_per_move = data['final_score'] / data['total_moves'] if data['total_moves'] > 0 else 0
-        print(f"{seed:<8} {data['final_score']:<12} {data['game_duration']:<12.2f} {data['total_moves']:<12} {score_per_move:<12.2f}")
+        moves_per_log = data.total_moves / data.final_scores.count
+        score_per_move = data.final_scores.mean / moves_per_log if moves_per_log > 0 else 0
+        print(f"{seed:<8} {data.final_scores.max:<12} {data.durations.max:<12.2f} {data.total_moves:<12} {score_per_move:<12.2f} {data.final_scores.count:<6}")
+    
+    print(f"\nBest performing seed: {sorted_seeds[0][0]} (Score: {sorted_seeds[0][1].final_scores.max})")
+    print(f"Worst performing seed: {sorted_seeds[-1][0]} (Score: {sorted_seeds[-1][1].final_scores.max})")
     
-    print(f"\nBest performing seed: {sorted_seeds[0][0]} (Score: {sorted_seeds[0][1]['final_score']})")
-    print(f"Worst performing seed: {sorted_seeds[-1][0]} (Score: {sorted_seeds[-1][1]['final_score']})")
+    merged = LogSummary()
+    for _, data in sorted_seeds:
+        merged.merge(data)
+    print(f"\n=== All {merged.final_scores.count} logs ===")
+    print(f"Total moves: {merged.total_moves}")
+    print(f"Final score: mean {merged.final_scores.mean:.2f}, std {merged.final_scores.variance ** 0.5:.2f}, "
+          f"min {merged.final_scores.min}, max {merged.final_scores.max}")
+    print(f"Game duration: mean {merged.durations.mean:.2f} s, max {merged.durations.max:.2f} s")
+    print(f"Chosen probability: mean {merged.chosen_probabilities.mean:.4f}, "
+          f"median {merged.chosen_probability_sketch.quantile(0.5):.4f}, "
+          f"p10 {merged.chosen_probability_sketch.quantile(0.1):.4f}, p90 {merged.chosen_probability_sketch.quantile(0.9):.4f}")
 
 def main():
-    parser = argparse.ArgumentParser(description='Analyze Tetris AI CSV logs')
-    parser.add_argument('--file', '-f', type=str, help='Specific CSV file to analyze')
+    parser = argparse.ArgumentParser(description='Analyze Tetris AI move logs (binary or CSV)')
+    parser.add_argument('--file', '-f', type=str, help='Specific log file to analyze')
     parser.add_argument('--list', '-l', action='store_true', help='List all available log files')
     parser.add_argument('--latest', action='store_true', help='Analyze the latest log file')
     parser.add_argument('--compare', '-c', action='store_true', help='Compare performance across different seeds')
+    parser.add_argument('--export-csv', type=str, metavar='FILE', help='Convert a binary move log to CSV')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Processes reading logs for --compare (default: CPU count)')
+    parser.add_argument('--run', type=str, default=None, help='Only the logs of this run id (--list, --latest, --compare)')
     
     args = parser.parse_args()
     
+    if args.export_csv:
+        print(f"Exported to: {export_csv(args.export_csv)}")
+        return
+    
     if args.list:
         print("Available log files:")
-        files = list_log_files()
+        files = list_log_files(run_id=args.run)
         for i, file in enumerate(files, 1):
             print(f"  {i}. {file}")
         return
     
     if args.compare:
-        compare_seeds()
+        compare_seeds(jobs=args.jobs, run_id=args.run)
         return
     
     if args.latest:
-        files = list_log_files()
+        files = list_log_files(run_id=args.run)
         if files:
             analyze_csv_log(files[0])
         else:
@@ -163,7 +336,7 @@ def main():
         analyze_csv_log(args.file)
         return
     
-    files = list_log_files()
+    files = list_log_files(run_id=args.run)
     if files:
         print("No specific file provided. Analyzing latest log file:")
         analyze_csv_log(files[0])
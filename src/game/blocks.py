@@ -23,6 +23,18 @@ TETROMINOES_INDEXES = {
     'L': 6
 }
 
+def _rotate_blocks(blocks, rotation):
+    """Rotate block offsets clockwise rotation times, the same way Tetromino.rotate does."""
+    for _ in range(rotation % 4):
+        blocks = [(y, -x) for x, y in blocks]
+    return blocks
+
+# Block offsets of every shape for each rotation state (0-3), O never changes
+ROTATED_TETROMINOES = {
+    shape: [list(blocks) if shape == 'O' else _rotate_blocks(blocks, rotation) for rotation in range(4)]
+    for shape, blocks in TETROMINOES.items()
+}
+
 class Tetromino:
     def __init__(self, shape=None, x=None, y=None, rng=None):
         """
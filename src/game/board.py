@@ -1,20 +1,59 @@
 
-import pygame
-from game.constants import GRID_WIDTH, GRID_HEIGHT, CELL_SIZE, BOARD_OFFSET_X, BOARD_OFFSET_Y, COLORS, BLACK, GRAY, WHITE
+import numpy as np
+from game.constants import GRID_WIDTH, GRID_HEIGHT, CLEAR_ANIMATION_FRAMES
 from game.pooling_algorithms import *
+from game.board_statistics import BoardStatistics
+from game.zobrist import ROW_KEYS, board_hash
+from game.collision_tables import fits
+from game.blocks import ROTATED_TETROMINOES
+
+FULL_ROW_MASK = (1 << GRID_WIDTH) - 1
 
 class Board:
-    def __init__(self, area_count=8):
-        """Initialize an empty Tetris board."""
+    def __init__(self, area_count=8, history_window=None, instant_clear=False):
+        """
+        Initialize an empty Tetris board.
+        
+        Args:
+            area_count (int): Amount of areas the board is divided into for pooling
+            history_window (int, optional): Length of the recent history kept by the board statistics, None keeps no history
+            instant_clear (bool): Clear full lines as soon as a tetromino is added instead of after the flash animation
+        """
         # Create empty grid (None indicates empty cell)
         self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
         self.areas = {}
         # Track filled lines for clearing and scoring
         self.lines_to_clear = []
         self.clear_animation_counter = 0
+        self.instant_clear = instant_clear
+        self.cleared_on_lock = 0 # lines removed by the last add_tetromino in instant mode
         self._divide_into_areas(area_count=area_count)
         self.area_count = area_count
-        self.average_heights = []
+        self.statistics = BoardStatistics(window_size=history_window)
+        
+        # Skyline caches, kept up to date by add_tetromino and clear_lines so
+        # readers never have to scan the grid
+        self.column_heights = [0] * GRID_WIDTH
+        self.column_holes = [0] * GRID_WIDTH
+        self.column_block_counts = [0] * GRID_WIDTH
+        self.surface = [0] * (GRID_WIDTH - 1) # height differences between neighbouring columns
+        self.holes = 0
+        
+        # Bumped whenever the contents change (lock, line clear, restore), readers
+        # that derive features from the board recompute them only when it moves
+        self.version = 0
+        
+        # Summed-area table of the cells, rebuilt on read when the version moved
+        self._summed_area_table = None
+        self._summed_area_version = None
+        
+        # Occupancy bitmasks, bit x of row_masks[y] and bit y of column_masks[x]
+        # are set when grid[y][x] holds a block
+        self.row_masks = [0] * GRID_HEIGHT
+        self.column_masks = [0] * GRID_WIDTH
+        
+        # Zobrist hash of the occupancy, XOR of ROW_KEYS[y][row_masks[y]]
+        self.zobrist_hash = 0
         
     #   It should be like this
     #   1   2
@@ -37,45 +76,124 @@ class Board:
                 y_start = row * area_height
                 y_end = (row + 1) * area_height if row < GRID_HEIGHT - 1 else GRID_HEIGHT - 1
                 #print(f'Area {area_id} width: {x_end - x_start} and height: {y_end - y_start}')
-                                
-                self.areas[area_id] = [x_start, x_end, y_start, y_end]
+                
+                # whole cells, so pooling does not convert the bounds on every call
+                self.areas[area_id] = [round(x_start), round(x_end), round(y_start), round(y_end)]
                 area_id += 1
     
     def get_area_pooled(self, area_id:int, pooling_algorithm:PoolingAlgorithm=None):
         # should be mean by default
         if pooling_algorithm == None:
-            pooling_algorithm = MeanPoolingAlgorithm()
-                
-        try:
-            area = self.areas[area_id]
-            # end - start X, end - start Y, startX, startY
-            value = pooling_algorithm(self.grid, (area[1] - area[0]), (area[3] - area[2]), area[0], area[2])
-            #print(f'Pooling value: {value} for area: {area_id}')
-            return value
-        except:
+            pooling_algorithm = SummedAreaPoolingAlgorithm()
+        
+        area = self.areas.get(area_id)
+        if area is None:
             return 0.0
         
+        cells = self.get_summed_area_table() if pooling_algorithm.uses_summed_area_table else self.grid
+        # end - start X, end - start Y, startX, startY
+        value = pooling_algorithm(cells, (area[1] - area[0]), (area[3] - area[2]), area[0], area[2])
+        #print(f'Pooling value: {value} for area: {area_id}')
+        return value
+        
     def get_area_size(self, area_id:int):
-        try:
-            area = self.areas[area_id]
-            # (end - start X) * (end - start Y) = area size
-            return (area[1] - area[0]) * (area[3] - area[2])
-        except:
+        area = self.areas.get(area_id)
+        if area is None:
             return 1.0 # cannot be 0 so no division by 0 happens by accident
+        # (end - start X) * (end - start Y) = area size
+        return (area[1] - area[0]) * (area[3] - area[2])
+    
+    def get_summed_area_table(self):
+        """
+        Get the summed-area table of the board, see summed_area_table.
+        
+        Returns:
+            np.ndarray: (GRID_HEIGHT + 1, GRID_WIDTH + 1) filled cell counts, shared until the board changes
+        """
+        if self._summed_area_version != self.version:
+            occupancy = (np.array(self.row_masks)[:, None] >> np.arange(GRID_WIDTH)) & 1
+            self._summed_area_table = summed_area_table(occupancy)
+            self._summed_area_version = self.version
+        return self._summed_area_table
         
     def get_column_heights(self):
-        columns = []
-        for col in range(GRID_WIDTH):
-            col_height = 20
-            row = GRID_HEIGHT - 1
-            while(row >= 0):
-                if (self.grid[row][col] != None):
-                        break
-                col_height -= 1
-                row -= 1
-            columns.append(col_height)
-        self.average_heights.append(sum(columns) / float(len(columns)))
-        return columns
+        """
+        Return the cached column heights.
+        
+        The returned list is the board's own cache, callers must not modify it.
+        """
+        return self.column_heights
+    
+    def record_statistics(self):
+        """Add the current board state to the running statistics."""
+        self.statistics.record(self)
+    
+    def get_holes(self):
+        """Return the cached total count of empty cells covered by a block."""
+        return self.holes
+    
+    def get_surface(self):
+        """Return the cached height differences between neighbouring columns."""
+        return self.surface
+    
+    def get_drop_distance(self, positions):
+        """
+        Calculate how far a set of positions can fall before hitting a block or the floor.
+        
+        Args:
+            positions (list): List of (x, y) tuples representing block positions
+            
+        Returns:
+            int: Amount of rows the positions can be moved down
+        """
+        distance = None
+        for x, y in positions:
+            if x < 0 or x >= GRID_WIDTH:
+                return 0
+            # First filled row strictly below the block, rows above the grid are always empty
+            start = y + 1 if y >= -1 else 0
+            below = self.column_masks[x] >> start
+            first_filled = start + (below & -below).bit_length() - 1 if below else GRID_HEIGHT
+            if distance is None or first_filled - y - 1 < distance:
+                distance = first_filled - y - 1
+        return distance
+    
+    def get_placement_drop_distance(self, shape, rotation, x, y):
+        """
+        Calculate how far a tetromino given by shape, rotation and pivot can fall.
+        
+        Args:
+            shape (str): Shape type
+            rotation (int): Rotation state, 0-3
+            x (int): Pivot x position
+            y (int): Pivot y position
+            
+        Returns:
+            int: Amount of rows the tetromino can be moved down
+        """
+        return self.get_drop_distance([(x + dx, y + dy) for dx, dy in ROTATED_TETROMINOES[shape][rotation]])
+    
+    def _scan_column(self, col):
+        """Recompute the height and hole count of a single column from its mask."""
+        mask = self.column_masks[col]
+        height = GRID_HEIGHT - ((mask & -mask).bit_length() - 1) if mask else 0
+        blocks = mask.bit_count()
+        self.column_heights[col] = height
+        self.column_block_counts[col] = blocks
+        self._set_column_holes(col, height - blocks)
+    
+    def _set_column_holes(self, col, holes):
+        self.holes += holes - self.column_holes[col]
+        self.column_holes[col] = holes
+    
+    def _update_surface(self, columns):
+        """Refresh the surface entries next to the given columns."""
+        heights = self.column_heights
+        for col in columns:
+            if col > 0:
+                self.surface[col - 1] = heights[col] - heights[col - 1]
+            if col < GRID_WIDTH - 1:
+                self.surface[col] = heights[col + 1] - heights[col]
     
     def get_almost_complete_lines(self, almost_complete_max_block_count:int):
         return [1 if row.count(None) <= almost_complete_max_block_count else 0 for row in self.grid]
@@ -113,6 +231,21 @@ class Board:
                 
         return True
     
+    def is_valid_placement(self, shape, rotation, x, y):
+        """
+        Check if a tetromino fits on the board, see collision_tables.fits.
+        
+        Args:
+            shape (str): Shape type
+            rotation (int): Rotation state, 0-3
+            x (int): Pivot x position
+            y (int): Pivot y position
+            
+        Returns:
+            bool: True if the position is valid
+        """
+        return fits(self.row_masks, shape, rotation, x, y)
+    
     def add_tetromino(self, tetromino):
         """
         Place a tetromino on the board permanently.
@@ -131,13 +264,30 @@ class Board:
                 return False  # Game over
         
         # Add each block to the grid
+        touched_columns = set()
         for x, y in positions:
             #print(f'Adding {tetromino.color} to position: ({x},{y})')
             self.grid[y][x] = tetromino.color
+            self.zobrist_hash ^= ROW_KEYS[y][self.row_masks[y]]
+            self.row_masks[y] |= 1 << x
+            self.zobrist_hash ^= ROW_KEYS[y][self.row_masks[y]]
+            self.column_masks[x] |= 1 << y
+            self.column_block_counts[x] += 1
+            if GRID_HEIGHT - y > self.column_heights[x]:
+                self.column_heights[x] = GRID_HEIGHT - y
+            touched_columns.add(x)
+        
+        for col in touched_columns:
+            self._set_column_holes(col, self.column_heights[col] - self.column_block_counts[col])
+        self._update_surface(touched_columns)
+        self.version += 1
             
         # Check for completed lines
         self.check_lines()
         
+        # Without the animation full lines are removed right away
+        self.cleared_on_lock = self.clear_lines() if self.instant_clear and self.lines_to_clear else 0
+        
         return True
     
     def check_lines(self):
@@ -146,113 +296,119 @@ class Board:
         
         for y in range(GRID_HEIGHT):
             # Check if this row is completely filled
-            if all(cell is not None for cell in self.grid[y]):
+            if self.row_masks[y] == FULL_ROW_MASK:
                 self.lines_to_clear.append(y)
     
     def clear_lines(self):
         """Clear completed lines and shift rows down."""
-        # Sort lines in descending order to avoid shifting issues
-        lines = sorted(self.lines_to_clear, reverse=True)
+        cleared_count = len(self.lines_to_clear)
+        if cleared_count == 0:
+            self.clear_animation_counter = 0
+            return 0
+        
+        # Keep the remaining rows in order and add new empty lines at the top
+        # (popping rows one by one shifts the indexes of the ones left to clear)
+        lines = set(self.lines_to_clear)
+        kept_rows = [row for y, row in enumerate(self.grid) if y not in lines]
+        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(cleared_count)] + kept_rows
+        self.row_masks = [0] * cleared_count + [mask for y, mask in enumerate(self.row_masks) if y not in lines]
+        # every kept row moved, so rehash (the keys depend on the row index)
+        self.zobrist_hash = board_hash(self.row_masks)
         
-        for line in lines:
-            # Remove the completed line
-            self.grid.pop(line)
-            # Add a new empty line at the top
-            self.grid.insert(0, [None for _ in range(GRID_WIDTH)])
+        # Drop the cleared bits from each column mask, top line first so the
+        # indexes of the lines left to remove stay valid
+        sorted_lines = sorted(lines)
+        for col in range(GRID_WIDTH):
+            mask = self.column_masks[col]
+            for line in sorted_lines:
+                above = mask & ((1 << line) - 1)
+                mask = ((mask >> (line + 1)) << (line + 1)) | (above << 1)
+            self.column_masks[col] = mask
+        
+        # Every cleared line held one block of each column, so a column only
+        # needs a rescan when its top block was removed with the line
+        top_cleared_row = sorted_lines[0]
+        for col in range(GRID_WIDTH):
+            self.column_block_counts[col] -= cleared_count
+            if GRID_HEIGHT - self.column_heights[col] == top_cleared_row:
+                self._scan_column(col)
+            else:
+                self.column_heights[col] -= cleared_count
+        self._update_surface(range(GRID_WIDTH))
+        self.version += 1
         
         # Reset lines to clear
-        cleared_count = len(self.lines_to_clear)
         self.lines_to_clear = []
         self.clear_animation_counter = 0
         
         return cleared_count
     
-    def update_clear_animation(self):
-        """Update the line clearing animation counter."""
-        if self.lines_to_clear:
-            self.clear_animation_counter += 1
-            # After animation is complete, actually clear the lines
-            if self.clear_animation_counter >= 10:  # 10 frames for the animation
-                return self.clear_lines()
-        return 0
-    
-    def draw(self, screen):
+    def snapshot(self):
         """
-        Draw the board and its contents.
+        Capture the board contents and caches in an immutable tuple.
         
-        Args:
-            screen (pygame.Surface): The screen to draw on
+        The running statistics are not part of the snapshot.
+        
+        Returns:
+            tuple: State to pass to restore
         """
-        # Draw the board background
-        board_rect = pygame.Rect(
-            BOARD_OFFSET_X - 1, 
-            BOARD_OFFSET_Y - 1, 
-            GRID_WIDTH * CELL_SIZE + 2, 
-            GRID_HEIGHT * CELL_SIZE + 2
+        return (
+            tuple(map(tuple, self.grid)),
+            tuple(self.row_masks),
+            tuple(self.column_masks),
+            tuple(self.column_heights),
+            tuple(self.column_holes),
+            tuple(self.column_block_counts),
+            tuple(self.surface),
+            self.holes,
+            tuple(self.lines_to_clear),
+            self.clear_animation_counter
         )
-        pygame.draw.rect(screen, WHITE, board_rect, 2)
-        
-        # Draw the grid cells
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
-                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
-                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
-                
-                # Draw filled cell or empty cell
-                if self.grid[y][x] is not None:
-                    # If this line is being cleared, flash it
-                    if y in self.lines_to_clear:
-                        if self.clear_animation_counter % 2 == 0:
-                            pygame.draw.rect(screen, WHITE, cell_rect)
-                        else:
-                            pygame.draw.rect(screen, self.grid[y][x], cell_rect)
-                    else:
-                        pygame.draw.rect(screen, self.grid[y][x], cell_rect)
-                    # Draw cell border
-                    pygame.draw.rect(screen, BLACK, cell_rect, 1)
-                else:
-                    # Draw empty cell with slight grid pattern
-                    pygame.draw.rect(screen, BLACK, cell_rect)
-                    pygame.draw.rect(screen, GRAY, cell_rect, 1)
     
-    def draw_tetromino(self, screen, tetromino):
+    def restore(self, snapshot):
         """
-        Draw a tetromino on the board.
+        Bring the board back to a state captured by snapshot.
         
         Args:
-            screen (pygame.Surface): The screen to draw on
-            tetromino (Tetromino): The tetromino to draw
+            snapshot (tuple): State returned by snapshot
         """
-        for x, y in tetromino.get_positions():
-            # Only draw blocks within the visible grid
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
-                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
-                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
-                
-                pygame.draw.rect(screen, tetromino.color, cell_rect)
-                pygame.draw.rect(screen, BLACK, cell_rect, 1)
+        (grid, row_masks, column_masks, column_heights, column_holes, column_block_counts,
+         surface, self.holes, lines_to_clear, self.clear_animation_counter) = snapshot
+        self.grid = list(map(list, grid))
+        self.row_masks = list(row_masks)
+        self.column_masks = list(column_masks)
+        self.column_heights = list(column_heights)
+        self.column_holes = list(column_holes)
+        self.column_block_counts = list(column_block_counts)
+        self.surface = list(surface)
+        self.lines_to_clear = list(lines_to_clear)
+        self.zobrist_hash = board_hash(self.row_masks)
+        # A new version rather than the captured one, the board may have moved on from it
+        self.version += 1
     
-    def draw_ghost(self, screen, tetromino, ghost_y):
+    def update_clear_animation(self):
+        """Update the line clearing animation counter."""
+        return self.advance_clear_animation(1)
+    
+    def advance_clear_animation(self, frames):
         """
-        Draw the ghost piece (where the tetromino will land).
+        Run the line clearing animation for several frames at once.
         
         Args:
-            screen (pygame.Surface): The screen to draw on
-            tetromino (Tetromino): The current tetromino
-            ghost_y (int): The y-offset for the ghost piece
+            frames (int): Amount of frames that passed
+            
+        Returns:
+            int: Amount of lines cleared, 0 while the animation is still running
         """
-        ghost_positions = [(x, y + ghost_y) for x, y in tetromino.get_positions()]
-        
-        for x, y in ghost_positions:
-            # Only draw blocks within the visible grid
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
-                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
-                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
-                
-                # Draw semi-transparent ghost block
-                ghost_color = (*tetromino.color[:3], 100)  # Transparent version of the color
-                pygame.draw.rect(screen, ghost_color, cell_rect)
-                pygame.draw.rect(screen, BLACK, cell_rect, 1)
\ No newline at end of file
+        if self.lines_to_clear:
+            self.clear_animation_counter += frames
+            # After animation is complete, actually clear the lines
+            if self.clear_animation_counter >= CLEAR_ANIMATION_FRAMES:
+                return self.clear_lines()
+        return 0
+    
+    def get_clear_animation_frames_left(self):
+        """Frames until the full lines are removed, None if no lines are waiting."""
+        if not self.lines_to_clear:
+            return None
+        return max(CLEAR_ANIMATION_FRAMES - self.clear_animation_counter, 0)
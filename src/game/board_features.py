@@ -0,0 +1,189 @@
+import numpy as np
+from game.blocks import TETROMINOES_INDEXES
+from game.constants import GRID_WIDTH, GRID_HEIGHT
+from game.pooling_algorithms import summed_area_table, pyramid_areas
+
+# Network input layout, follows the input node order of InputDataExtended.to_dict
+OBSERVATION_SIZE = 24 # x, y, block type, rotation, 10 column heights, drop distance, 9 height differences
+OBS_X = 0
+OBS_Y = 1
+OBS_BLOCK_TYPE = 2
+OBS_ROTATION = 3
+OBS_COLUMNS = slice(4, 4 + GRID_WIDTH)
+OBS_DROP_DISTANCE = 4 + GRID_WIDTH
+OBS_DIFFERENCES = slice(OBS_DROP_DISTANCE + 1, OBSERVATION_SIZE)
+# pooling pyramid inputs, if enabled, follow the base inputs (OBSERVATION_SIZE onwards)
+
+# bit x of a row mask is column x
+_BIT_SHIFTS = np.arange(GRID_WIDTH)
+# height a filled cell on row y gives its column
+_ROW_HEIGHTS = (GRID_HEIGHT - np.arange(GRID_HEIGHT))[:, None]
+
+class FeatureExtractor:
+    def __init__(self, batch_size=None, pyramid=None):
+        """
+        Computes the board features of one board, or a batch of them, in a single vectorized pass.
+
+        Every feature is written into arrays allocated once here, so extracting features
+        for a frame does not build any Python lists.
+
+        Features come in two groups: board features (everything extract computes) only
+        change when the board does, piece features (position, shape, rotation, drop distance)
+        change every frame and are the only ones write_observation touches.
+
+        Args:
+            batch_size (int, optional): Amount of boards handled at once, None for a single board
+            pyramid (tuple, optional): (columns, rows) levels pooled into extra inputs (e.g. POOLING_PYRAMID),
+                each input being the fill ratio of one area
+        """
+        self.batch_size = batch_size
+        batch = () if batch_size is None else (batch_size,)
+
+        # 0/1 occupancy plane, row 0 is the top of the board
+        self.occupancy = np.zeros(batch + (GRID_HEIGHT, GRID_WIDTH), dtype=np.int64)
+
+        self.heights = np.zeros(batch + (GRID_WIDTH,), dtype=np.int64)
+        self.differences = np.zeros(batch + (GRID_WIDTH - 1,), dtype=np.int64) # heights[c + 1] - heights[c]
+        self.holes = np.zeros(batch + (GRID_WIDTH,), dtype=np.int64) # empty cells below the column top
+        self.wells = np.zeros(batch + (GRID_WIDTH,), dtype=np.int64) # depth below the lower neighbour, walls count as full
+        self.bumpiness = np.zeros(batch, dtype=np.int64) # sum of absolute height differences
+        self.row_fill = np.zeros(batch + (GRID_HEIGHT,), dtype=np.int64) # filled cells per row
+
+        # area pooling pyramid, fill ratios read from a summed-area table
+        self.pyramid = pyramid
+        self.summed_area_table = None
+        pyramid_size = 0
+        if pyramid:
+            self._area_x_start, self._area_y_start, self._area_x_end, self._area_y_end = pyramid_areas(pyramid, GRID_WIDTH, GRID_HEIGHT)
+            self._area_sizes = (self._area_x_end - self._area_x_start) * (self._area_y_end - self._area_y_start)
+            self.summed_area_table = np.zeros(batch + (GRID_HEIGHT + 1, GRID_WIDTH + 1), dtype=np.int64)
+            pyramid_size = len(self._area_sizes)
+        self.pooled = slice(OBSERVATION_SIZE, OBSERVATION_SIZE + pyramid_size)
+
+        self.observation = np.zeros(batch + (OBSERVATION_SIZE + pyramid_size,))
+
+        # board and version the board features were last extracted from, see refresh_board
+        self._board = None
+        self._board_version = None
+
+        # scratch buffers
+        self._cell_heights = np.zeros_like(self.occupancy)
+        self._column_fill = np.zeros_like(self.heights)
+        self._abs_differences = np.zeros_like(self.differences)
+        self._walled_heights = np.full(batch + (GRID_WIDTH + 2,), GRID_HEIGHT, dtype=np.int64)
+
+    def load_board(self, board):
+        """
+        Fill the occupancy plane from a board's row masks.
+
+        Args:
+            board (Board): The board, for a single board extractor
+        """
+        self._unpack_masks(np.array(board.row_masks))
+
+    def load_boards(self, boards):
+        """
+        Fill the occupancy planes from the row masks of a batch of boards.
+
+        Args:
+            boards (list): batch_size Board instances
+        """
+        self._unpack_masks(np.array([board.row_masks for board in boards]))
+
+    def refresh_board(self, board):
+        """
+        Extract the board features of a single board, unless they are already up to date.
+
+        Args:
+            board (Board): The board
+
+        Returns:
+            bool: True if the features were recomputed, False if the board did not change
+        """
+        if board is self._board and board.version == self._board_version:
+            return False
+
+        self.load_board(board)
+        self.extract()
+        self._board = board
+        self._board_version = board.version
+        return True
+
+    def load_occupancy(self, occupancy):
+        """
+        Copy an occupancy plane (or batch of them) of any boolean or integer type.
+
+        Args:
+            occupancy (np.ndarray): Array shaped like self.occupancy, truthy where a cell is filled
+        """
+        np.copyto(self.occupancy, occupancy)
+
+    def _unpack_masks(self, row_masks):
+        np.right_shift(row_masks[..., None], _BIT_SHIFTS, out=self.occupancy)
+        np.bitwise_and(self.occupancy, 1, out=self.occupancy)
+
+    def extract(self):
+        """
+        Compute every board feature from the loaded occupancy and write the board part of the observation.
+
+        Returns:
+            FeatureExtractor: self, features are read from its arrays
+        """
+        occupancy = self.occupancy
+        # whatever was loaded, the features no longer belong to the board refresh_board saw
+        self._board = None
+
+        # the highest filled cell gives the column height
+        np.multiply(occupancy, _ROW_HEIGHTS, out=self._cell_heights)
+        np.max(self._cell_heights, axis=-2, out=self.heights)
+
+        # every cell under the top that is not filled is a hole
+        np.sum(occupancy, axis=-2, out=self._column_fill)
+        np.subtract(self.heights, self._column_fill, out=self.holes)
+
+        np.sum(occupancy, axis=-1, out=self.row_fill)
+
+        np.subtract(self.heights[..., 1:], self.heights[..., :-1], out=self.differences)
+        np.abs(self.differences, out=self._abs_differences)
+        np.sum(self._abs_differences, axis=-1, out=self.bumpiness)
+
+        self._walled_heights[..., 1:-1] = self.heights
+        np.minimum(self._walled_heights[..., :-2], self._walled_heights[..., 2:], out=self.wells)
+        np.subtract(self.wells, self.heights, out=self.wells)
+        np.maximum(self.wells, 0, out=self.wells)
+
+        observation = self.observation
+        np.divide(self.heights, float(GRID_HEIGHT), out=observation[..., OBS_COLUMNS])
+        np.divide(self.differences, float(GRID_HEIGHT), out=observation[..., OBS_DIFFERENCES])
+
+        if self.pyramid:
+            table = summed_area_table(occupancy, out=self.summed_area_table)
+            filled = (table[..., self._area_y_end, self._area_x_end] - table[..., self._area_y_start, self._area_x_end]
+                      - table[..., self._area_y_end, self._area_x_start] + table[..., self._area_y_start, self._area_x_start])
+            np.divide(filled, self._area_sizes, out=observation[..., self.pooled])
+
+        return self
+
+    def write_observation(self, x, y, shape, rotation, drop_distance):
+        """
+        Write the normalized piece inputs, the board inputs are left as extract wrote them.
+
+        Piece values are scalars for a single board or arrays of batch_size.
+
+        Args:
+            x (int or np.ndarray): Tetromino x position
+            y (int or np.ndarray): Tetromino y position
+            shape (int or np.ndarray): Tetromino shape index (TETROMINOES_INDEXES)
+            rotation (int or np.ndarray): Rotation state, 0-3
+            drop_distance (int or np.ndarray): Distance of the last hard drop
+
+        Returns:
+            np.ndarray: The observation vector (or matrix), reused by the next call
+        """
+        observation = self.observation
+        observation[..., OBS_X] = x / float(GRID_WIDTH)
+        observation[..., OBS_Y] = y / float(GRID_HEIGHT)
+        observation[..., OBS_BLOCK_TYPE] = shape / float(len(TETROMINOES_INDEXES))
+        observation[..., OBS_ROTATION] = rotation / 3.0 # 0 - 3 values
+        observation[..., OBS_DROP_DISTANCE] = drop_distance / float(GRID_HEIGHT)
+        return observation
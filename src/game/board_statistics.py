@@ -0,0 +1,31 @@
+from game.constants import GRID_WIDTH
+from misc.running_statistics import RunningStatistic
+
+class BoardStatistics:
+    def __init__(self, window_size:int=None):
+        """
+        Board statistics over the lifetime of a game.
+
+        Args:
+            window_size (int, optional): Size of the recent history kept for each statistic. No history is kept if None.
+        """
+        self.mean_height = RunningStatistic(window_size)
+        self.max_height = RunningStatistic(window_size)
+        self.holes = RunningStatistic(window_size)
+
+    def record(self, board):
+        """
+        Add one sample of the board state, should be called once per frame.
+
+        Args:
+            board (Board): The board to sample
+        """
+        heights = board.column_heights
+        self.mean_height.add(sum(heights) / float(GRID_WIDTH))
+        self.max_height.add(max(heights))
+        self.holes.add(board.holes)
+
+    def reset(self):
+        self.mean_height.reset()
+        self.max_height.reset()
+        self.holes.reset()
@@ -0,0 +1,112 @@
+from game.blocks import ROTATED_TETROMINOES
+from game.constants import GRID_WIDTH, GRID_HEIGHT
+
+# Static lookup tables for every shape and rotation state, built once at import.
+#
+# PIECE_ROWS[shape][rotation][x] holds ((dy, mask), ...): for a pivot at column x, the rows the
+# tetromino covers (relative to its pivot) and the row mask of its blocks on each of them.
+# Only pivots that keep every block between the walls are present, so a missing x is out of range.
+#
+# PIECE_BOTTOMS[shape][rotation] holds ((dx, dy), ...): the lowest block of every column the
+# tetromino covers. For a tetromino in a valid position they alone decide how far it can fall.
+
+def _build_rows(blocks):
+    min_dx = min(dx for dx, _ in blocks)
+    max_dx = max(dx for dx, _ in blocks)
+    rows = {}
+    for x in range(-min_dx, GRID_WIDTH - max_dx):
+        masks = {}
+        for dx, dy in blocks:
+            masks[dy] = masks.get(dy, 0) | (1 << (x + dx))
+        rows[x] = tuple(sorted(masks.items()))
+    return rows
+
+def _build_bottoms(blocks):
+    bottoms = {}
+    for dx, dy in blocks:
+        bottoms[dx] = max(dy, bottoms.get(dx, dy))
+    return tuple(sorted(bottoms.items()))
+
+PIECE_ROWS = {
+    shape: [_build_rows(blocks) for blocks in rotations]
+    for shape, rotations in ROTATED_TETROMINOES.items()
+}
+
+PIECE_BOTTOMS = {
+    shape: [_build_bottoms(blocks) for blocks in rotations]
+    for shape, rotations in ROTATED_TETROMINOES.items()
+}
+
+# (min_x, max_x) pivot columns of every shape and rotation
+X_RANGES = {
+    shape: [(min(rows), max(rows)) for rows in rotations]
+    for shape, rotations in PIECE_ROWS.items()
+}
+
+def fits(row_masks, shape, rotation, x, y):
+    """
+    Check if a tetromino fits on a board, the table driven version of Board.is_valid_position.
+
+    Args:
+        row_masks (list): Occupancy bitmask of every row
+        shape (str): Shape type
+        rotation (int): Rotation state, 0-3
+        x (int): Pivot x position
+        y (int): Pivot y position
+
+    Returns:
+        bool: True if the tetromino is inside the walls, above the floor and overlaps nothing
+    """
+    rows = PIECE_ROWS[shape][rotation].get(x)
+    if rows is None:
+        return False
+    for dy, mask in rows:
+        row = y + dy
+        if row >= GRID_HEIGHT:
+            return False
+        # Blocks above the visible grid are allowed (for spawning)
+        if row >= 0 and row_masks[row] & mask:
+            return False
+    return True
+
+def legal_placements(board, shape, rotation, x, y):
+    """
+    List every placement a tetromino can reach from where it is, in one sweep.
+
+    Reachable means what Engine.place allows: rotate clockwise in place, then shift one
+    column at a time, and drop. Rotations stop at the first blocked one, shifts at the first
+    blocked column on each side.
+
+    Args:
+        board (Board): The board
+        shape (str): Shape type
+        rotation (int): Current rotation state
+        x (int): Current pivot x position
+        y (int): Current pivot y position
+
+    Returns:
+        list: (rotation, x, landing_y) of every reachable placement
+    """
+    row_masks = board.row_masks
+    placements = []
+
+    # O never changes its rotation state, see Tetromino.rotate
+    rotation_count = 1 if shape == 'O' else 4
+    for step in range(rotation_count):
+        target_rotation = (rotation + step) % 4
+        if not fits(row_masks, shape, target_rotation, x, y):
+            break
+
+        min_x, max_x = X_RANGES[shape][target_rotation]
+        left = x
+        while left > min_x and fits(row_masks, shape, target_rotation, left - 1, y):
+            left -= 1
+        right = x
+        while right < max_x and fits(row_masks, shape, target_rotation, right + 1, y):
+            right += 1
+
+        bottoms = PIECE_BOTTOMS[shape][target_rotation]
+        for target_x in range(left, right + 1):
+            landing_y = y + board.get_drop_distance([(target_x + dx, y + dy) for dx, dy in bottoms])
+            placements.append((target_rotation, target_x, landing_y))
+    return placements
@@ -21,6 +21,8 @@ CELL_SIZE = 30
 #    NO_MOVE = 5
 
 ALMOST_COMPLETE_LINES_BLOCK_COUNT = 3
+# (columns, rows) of every level of the area pooling pyramid, optional network inputs
+POOLING_PYRAMID = ((2, 4), (5, 4), (10, 20))
 
 # output!!
     
@@ -64,6 +66,7 @@ SPEED_TEST_MULTIPLIER = 10.0
 LEVEL_SPEEDUP = 0.8  # Each level is 20% faster than the previous level
 EMPIRICAL_MAX_SPEED = 10000 # this can be changed
 SOFT_DROP_FACTOR = 0.1  # Soft drop is 10x faster than normal
+CLEAR_ANIMATION_FRAMES = 10  # Frames full lines flash before they are removed
 
 # Scoring
 POINTS_PER_LINE = {
@@ -84,6 +87,11 @@ KEY_INTERVAL = 100
 DEFAULT_SEED = 125 #None
 DEFAULT_SEED_MODEL = 12345
 
+# Pieces generated per seed at once, the sequence grows by this much when a game runs past it
+PIECE_SEQUENCE_LENGTH = 4096
+# Piece sequences a process keeps for reuse, the least recently used seed is dropped beyond that
+PIECE_SEQUENCE_CACHE_SIZE = 64
+
 # NEAT Network Visualizer window positioning consts
 NEAT_VIZ_X = 50
 NEAT_VIZ_Y = 50
@@ -92,4 +100,9 @@ NEAT_VIZ_HEIGHT = 400
 
 CSV_LOG_ENABLED = True
 CSV_LOG_FILENAME = "ai_moves.csv"
-CSV_LOG_DIRECTORY = "logs"
\ No newline at end of file
+CSV_LOG_DIRECTORY = "logs"
+CSV_LOG_BUFFER_SIZE = 65536 # moves held in memory for the writer thread, moves logged while it is full are dropped
+CSV_LOG_FLUSH_SIZE = 1024 # buffered moves that wake the writer before its interval
+CSV_LOG_FLUSH_INTERVAL = 1.0 # seconds between writes otherwise
+CSV_LOG_MAX_FILE_SIZE = 64 * 1024 * 1024 # bytes on disk after which a log continues in its next part file, None for no limit
+LOG_COMPRESSION = 'gzip' # move log compression: None, 'gzip' or 'lzma'
\ No newline at end of file
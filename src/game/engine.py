@@ -0,0 +1,478 @@
+import time
+import numpy as np
+from game.blocks import Tetromino, ROTATED_TETROMINOES
+from game.board import Board
+from game.collision_tables import legal_placements
+from game.piece_sequence import get_piece_sequence
+from game.zobrist import CURRENT_PIECE_KEYS, NEXT_PIECE_KEYS
+from game.game_state import GameSnapshot
+from game.constants import (
+    INITIAL_FALL_SPEED, LEVEL_SPEEDUP, POINTS_PER_LINE, SOFT_DROP_FACTOR,
+    SOFT_DROP_POINTS, HARD_DROP_POINTS, DEFAULT_SEED, FPS, Movement
+)
+
+class TetrisEngine:
+    def __init__(self, seed=DEFAULT_SEED, instant_line_clears=False, wall_clock_gravity=True, fall_speed_multiplier=1.0,
+                 event_driven=False):
+        """
+        Initialize the game simulation, shared by every game front-end.
+
+        Args:
+            seed (int, optional): Random seed for tetromino generation, a random one is picked if None
+            instant_line_clears (bool): Clear full lines on lock, skipping the animation frames (for headless runs)
+            wall_clock_gravity (bool): Drop the tetromino when its fall time has passed, otherwise drop it on every update
+            fall_speed_multiplier (float): Divides the fall time when using the wall clock or the tick clock
+            event_driven (bool): Run on a simulated clock of FPS ticks per second instead, every update jumps
+                straight to the next tick where something happens (the tetromino falls or a line clear ends)
+        """
+        # Set the random seed if provided
+        if seed is not None:
+            self.seed = seed
+        else:
+            self.seed = int(np.random.default_rng().integers(0, 1000))
+
+        # Tetrominoes come from the seed's pregenerated sequence, shared by every game on it
+        self.pieces = get_piece_sequence(self.seed)
+        self.piece_index = 0
+
+        # Create the game board
+        self.board = Board(instant_clear=instant_line_clears)
+
+        # Game state
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.game_over = False
+        self.paused = False
+        self.current_drop_distance = 0
+
+        # Counters
+        self.hard_drop_count = 0
+        self.move_count = 0
+        self.final_average_board_height = 0.0
+
+        # Create the first tetromino
+        self.current_tetromino = self.next_piece()
+        self.next_tetromino = self.next_piece()
+
+        # Initialize timing
+        self.wall_clock_gravity = wall_clock_gravity
+        self.fall_speed_multiplier = fall_speed_multiplier
+        self.last_fall_time = time.time()
+        self.fall_speed = INITIAL_FALL_SPEED / 1000  # Convert to seconds
+        self.soft_drop = False
+
+        # Simulated clock for event driven updates, in frames of FPS per second
+        self.event_driven = event_driven
+        self.tick = 0
+        self.last_fall_tick = 0
+
+        # Set up a ghost piece (shows where the piece will land)
+        self.ghost_y_offset = self.calculate_drop_position()
+
+    def move_tetromino(self, dx, dy):
+        """
+        Move the current tetromino.
+
+        Args:
+            dx (int): Change in x position
+            dy (int): Change in y position
+
+        Returns:
+            bool: True if the move was successful, False otherwise
+        """
+        tetromino = self.current_tetromino
+
+        if self.board.is_valid_placement(tetromino.shape, tetromino.rotation, tetromino.x + dx, tetromino.y + dy):
+            tetromino.apply_move(dx, dy)
+
+            # Update ghost piece position
+            self.ghost_y_offset = self.calculate_drop_position()
+            return True
+        return False
+
+    def rotate_tetromino(self, clockwise=True):
+        """
+        Rotate the current tetromino.
+
+        Args:
+            clockwise (bool): True for clockwise, False for counter-clockwise
+
+        Returns:
+            bool: True if rotation was successful, False otherwise
+        """
+        tetromino = self.current_tetromino
+
+        # O never changes its rotation state, see Tetromino.rotate
+        rotation = tetromino.rotation
+        if tetromino.shape != 'O':
+            rotation = (rotation + (1 if clockwise else -1)) % 4
+
+        # Check the rotated tetromino before touching it
+        if self.board.is_valid_placement(tetromino.shape, rotation, tetromino.x, tetromino.y):
+            tetromino.blocks = list(ROTATED_TETROMINOES[tetromino.shape][rotation])
+            tetromino.rotation = rotation
+
+            # Update ghost piece position
+            self.ghost_y_offset = self.calculate_drop_position()
+            return True
+        return False
+
+    def hard_drop(self):
+        """Immediately drop the tetromino to the bottom."""
+        # Move straight to the landing row
+        self.current_drop_distance = self.calculate_drop_position()
+        self.current_tetromino.apply_move(0, self.current_drop_distance)
+        self.ghost_y_offset = 0
+
+        # Add points for hard drop
+        self.score += self.current_drop_distance * HARD_DROP_POINTS
+
+        # Lock the tetromino in place
+        self.lock_tetromino()
+
+    def can_place(self, rotation, column):
+        """
+        Check if the current tetromino can get to a rotation and column from where it is.
+
+        The path is the one a player would take: rotate clockwise in place, then shift
+        one column at a time, every step has to be a valid position.
+
+        Args:
+            rotation (int): Target rotation state, 0-3
+            column (int): Target x position
+
+        Returns:
+            bool: True if the target is reachable
+        """
+        tetromino = self.current_tetromino
+        shape, x, y = tetromino.shape, tetromino.x, tetromino.y
+        is_valid = self.board.is_valid_placement
+
+        # O never changes its rotation state, see Tetromino.rotate
+        current_rotation = tetromino.rotation
+        for step in range(1, (rotation - current_rotation) % 4 + 1):
+            if not is_valid(shape, (current_rotation + step) % 4, x, y):
+                return False
+
+        direction = 1 if column > x else -1
+        for step_x in range(x + direction, column + direction, direction):
+            if not is_valid(shape, rotation % 4, step_x, y):
+                return False
+        return True
+
+    def place(self, rotation, column):
+        """
+        Put the current tetromino at a rotation and column and drop it, in one call.
+
+        Replaces the sequence of single moves a controller would send: the tetromino
+        lands on the skyline, locks, clears lines and the next one spawns. Counts as one
+        move and scores like a hard drop.
+
+        Nothing is left pending: full lines are cleared and scored right away, also with
+        the clear animation on, and a next tetromino spawning into blocks ends the game.
+
+        Args:
+            rotation (int): Target rotation state, 0-3 (O ignores it)
+            column (int): Target x position
+
+        Returns:
+            bool: True if the tetromino was placed, False if the target is unreachable (nothing changes)
+        """
+        if self.game_over:
+            return False
+
+        tetromino = self.current_tetromino
+        if tetromino.shape == 'O':
+            rotation = tetromino.rotation
+        if not self.can_place(rotation, column):
+            return False
+
+        tetromino.blocks = list(ROTATED_TETROMINOES[tetromino.shape][rotation % 4])
+        tetromino.rotation = rotation % 4
+        tetromino.x = column
+
+        self.move_count += 1
+        self.hard_drop()
+        if self.game_over:
+            return True
+
+        # skip the frames the clear animation would take
+        if self.board.lines_to_clear:
+            self.add_cleared_lines(self.board.clear_lines())
+            self.ghost_y_offset = self.calculate_drop_position()
+
+        # with single moves a blocked spawn only ends the game when it fails to fall and lock,
+        # without a next placement to find out from it ends here
+        tetromino = self.current_tetromino
+        if not self.board.is_valid_placement(tetromino.shape, tetromino.rotation, tetromino.x, tetromino.y):
+            self.end_game()
+        return True
+
+    def get_legal_placements(self):
+        """
+        List every (rotation, x, landing_y) the current tetromino can reach, see collision_tables.legal_placements.
+
+        Empty only if the tetromino is blocked where it is, which place() turns into game over.
+        """
+        tetromino = self.current_tetromino
+        return legal_placements(self.board, tetromino.shape, tetromino.rotation, tetromino.x, tetromino.y)
+
+    def valid_action_mask(self):
+        """
+        Which controller moves would change the current tetromino, indexed by Movement value.
+
+        MOVE_LEFT, MOVE_RIGHT and ROTATE are off when their target position is blocked (and
+        ROTATE always for O, which does not rotate), NO_MOVE and HARD_DROP are always on.
+
+        Returns:
+            np.ndarray: Boolean mask of len(Movement) values
+        """
+        tetromino = self.current_tetromino
+        shape, rotation, x, y = tetromino.shape, tetromino.rotation, tetromino.x, tetromino.y
+        is_valid = self.board.is_valid_placement
+
+        mask = np.ones(len(Movement), dtype=bool)
+        mask[Movement.MOVE_LEFT] = is_valid(shape, rotation, x - 1, y)
+        mask[Movement.MOVE_RIGHT] = is_valid(shape, rotation, x + 1, y)
+        mask[Movement.ROTATE] = shape != 'O' and is_valid(shape, (rotation + 1) % 4, x, y)
+        return mask
+
+    def calculate_drop_position(self):
+        """Calculate how far the current tetromino can drop."""
+        tetromino = self.current_tetromino
+        return self.board.get_placement_drop_distance(tetromino.shape, tetromino.rotation, tetromino.x, tetromino.y)
+
+    def lock_tetromino(self):
+        """Lock the current tetromino in place and spawn a new one."""
+        # Add the current tetromino to the board
+        if not self.board.add_tetromino(self.current_tetromino):
+            self.end_game()
+            return
+
+        if self.board.cleared_on_lock > 0:
+            self.add_cleared_lines(self.board.cleared_on_lock)
+
+        # Create the next tetromino
+        self.current_tetromino = self.next_tetromino
+        self.next_tetromino = self.next_piece()
+
+        # Reset soft drop
+        self.soft_drop = False
+
+        # Update ghost piece position
+        self.ghost_y_offset = self.calculate_drop_position()
+
+    def end_game(self):
+        """End the game, keep its final statistics and release the front-end's resources."""
+        self.game_over = True
+        self.final_average_board_height = self.board.statistics.mean_height.mean
+        self.cleanup()
+
+    def next_piece(self):
+        """Take the next tetromino of the piece sequence."""
+        shape = self.pieces.shape_at(self.piece_index)
+        self.piece_index += 1
+        return Tetromino(shape=shape, x=5, y=0)
+
+    def get_state_hash(self):
+        """
+        Zobrist hash of the board occupancy together with the current and next tetromino shapes.
+
+        Returns:
+            int: 64-bit hash, equal for equal boards and pieces within and across games
+        """
+        return (self.board.zobrist_hash ^ CURRENT_PIECE_KEYS[self.current_tetromino.shape]
+                ^ NEXT_PIECE_KEYS[self.next_tetromino.shape])
+
+    def add_cleared_lines(self, lines_cleared):
+        """
+        Update the score and level after clearing lines.
+
+        Args:
+            lines_cleared (int): Amount of lines cleared at once
+        """
+        # Update score
+        self.score += POINTS_PER_LINE[lines_cleared] * self.level
+        self.lines_cleared += lines_cleared
+
+        # Level up every 10 lines
+        new_level = self.lines_cleared // 10 + 1
+        if new_level > self.level:
+            self.level = new_level
+            self.fall_speed *= LEVEL_SPEEDUP
+
+    def process_move(self, move):
+        """
+        Apply a single controller move to the current tetromino.
+
+        Args:
+            move (Movement): The move to apply
+        """
+        self.move_count += 1
+        if move == Movement.MOVE_LEFT:
+            self.move_tetromino(-1, 0)
+        elif move == Movement.MOVE_RIGHT:
+            self.move_tetromino(1, 0)
+        elif move == Movement.ROTATE:
+            self.rotate_tetromino()
+        elif move == Movement.HARD_DROP:
+            self.hard_drop_count += 1
+            self.hard_drop()
+
+    def is_fall_due(self, current_time):
+        """Check if it's time for the tetromino to fall."""
+        if not self.wall_clock_gravity:
+            return True
+
+        fall_time = self.fall_speed / self.fall_speed_multiplier
+        if self.soft_drop:
+            fall_time *= SOFT_DROP_FACTOR
+        return current_time - self.last_fall_time > fall_time
+
+    def step_gravity(self):
+        """Move the tetromino one row down, locking it if it can't move."""
+        if self.game_over:
+            return
+
+        # Try to move the tetromino down
+        if not self.move_tetromino(0, 1):
+            # If the tetromino can't move down, lock it in place
+            self.lock_tetromino()
+
+        # Add points for soft drop
+        if self.soft_drop:
+            self.score += SOFT_DROP_POINTS
+
+    @property
+    def simulated_time(self):
+        """Seconds of game time passed on the event driven clock."""
+        return self.tick / FPS
+
+    def get_fall_period_ticks(self):
+        """Ticks between two gravity steps at the current speed."""
+        fall_time = self.fall_speed / self.fall_speed_multiplier
+        if self.soft_drop:
+            fall_time *= SOFT_DROP_FACTOR
+        return max(1, round(fall_time * FPS))
+
+    def update(self):
+        """Update the game state."""
+        if self.game_over or self.paused:
+            return
+
+        if self.event_driven:
+            self.update_to_next_event()
+            return
+
+        current_time = time.time()
+
+        # Check if any lines need to be cleared
+        lines_cleared = self.board.update_clear_animation()
+        if lines_cleared > 0:
+            self.add_cleared_lines(lines_cleared)
+
+        self.on_frame()
+
+        if self.is_fall_due(current_time):
+            self.on_fall()
+            self.step_gravity()
+            self.last_fall_time = current_time
+
+    def update_to_next_event(self):
+        """
+        Skip the frames where nothing would change and run the next one that does.
+
+        The skipped frames only advance the line clear animation, which is done for all
+        of them at once. That gives the same game as updating once per tick only if
+        on_frame has no effect on the game: on_frame runs once per event here, not once
+        per tick, so a front-end acting in on_frame (TetrisGameHeadless moves every frame)
+        acts far less often than it would per tick. on_fall runs on the same falls either way.
+        """
+        next_tick = self.last_fall_tick + self.get_fall_period_ticks()
+        clear_frames_left = self.board.get_clear_animation_frames_left()
+        if clear_frames_left is not None:
+            next_tick = min(next_tick, self.tick + clear_frames_left)
+        next_tick = max(next_tick, self.tick)
+
+        lines_cleared = self.board.advance_clear_animation(next_tick - self.tick)
+        self.tick = next_tick
+        if lines_cleared > 0:
+            self.add_cleared_lines(lines_cleared)
+
+        self.on_frame()
+
+        if self.tick >= self.last_fall_tick + self.get_fall_period_ticks():
+            self.on_fall()
+            self.step_gravity()
+            self.last_fall_tick = self.tick
+
+    def on_frame(self):
+        """Called once per update, before gravity is checked. Front-ends override it to act every frame."""
+        pass
+
+    def on_fall(self):
+        """Called right before the tetromino falls. Front-ends override it to act once per fall."""
+        pass
+
+    def snapshot(self):
+        """
+        Capture the game state for a later restore.
+
+        Returns:
+            GameSnapshot: The captured state
+        """
+        tetromino = self.current_tetromino
+        return GameSnapshot(
+            board=self.board.snapshot(),
+            shape=tetromino.shape,
+            x=tetromino.x,
+            y=tetromino.y,
+            rotation=tetromino.rotation,
+            next_shape=self.next_tetromino.shape,
+            piece_index=self.piece_index,
+            score=self.score,
+            level=self.level,
+            lines_cleared=self.lines_cleared,
+            move_count=self.move_count,
+            hard_drop_count=self.hard_drop_count,
+            current_drop_distance=self.current_drop_distance,
+            fall_speed=self.fall_speed,
+            soft_drop=self.soft_drop,
+            game_over=self.game_over,
+            ghost_y_offset=self.ghost_y_offset,
+            tick=self.tick,
+            last_fall_tick=self.last_fall_tick
+        )
+
+    def restore(self, snapshot):
+        """
+        Bring the game back to a captured state.
+
+        Args:
+            snapshot (GameSnapshot): State returned by snapshot
+        """
+        self.board.restore(snapshot.board)
+
+        self.current_tetromino = Tetromino(shape=snapshot.shape, x=snapshot.x, y=snapshot.y)
+        self.current_tetromino.blocks = list(ROTATED_TETROMINOES[snapshot.shape][snapshot.rotation])
+        self.current_tetromino.rotation = snapshot.rotation
+        self.next_tetromino = Tetromino(shape=snapshot.next_shape, x=5, y=0)
+        self.piece_index = snapshot.piece_index
+
+        self.score = snapshot.score
+        self.level = snapshot.level
+        self.lines_cleared = snapshot.lines_cleared
+        self.move_count = snapshot.move_count
+        self.hard_drop_count = snapshot.hard_drop_count
+        self.current_drop_distance = snapshot.current_drop_distance
+        self.fall_speed = snapshot.fall_speed
+        self.soft_drop = snapshot.soft_drop
+        self.game_over = snapshot.game_over
+        self.ghost_y_offset = snapshot.ghost_y_offset
+        self.tick = snapshot.tick
+        self.last_fall_tick = snapshot.last_fall_tick
+
+    def cleanup(self):
+        """Release resources held by the front-end, called on game over."""
+        pass
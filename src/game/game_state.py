@@ -0,0 +1,20 @@
+class GameSnapshot:
+    """
+    Compact copy of everything that drives a game forward.
+
+    Holds only immutable values (tuples and numbers),
+    so one snapshot can be restored any number of times.
+    """
+    __slots__ = (
+        'board', 'shape', 'x', 'y', 'rotation', 'next_shape', 'piece_index',
+        'score', 'level', 'lines_cleared', 'move_count', 'hard_drop_count',
+        'current_drop_distance', 'fall_speed', 'soft_drop', 'game_over', 'ghost_y_offset',
+        'tick', 'last_fall_tick'
+    )
+
+    def __init__(self, **state):
+        for name in self.__slots__:
+            setattr(self, name, state[name])
+
+    def __str__(self):
+        return f"GameSnapshot({self.shape} at ({self.x}, {self.y}), rotation: {self.rotation}, next: {self.next_shape}, score: {self.score})"
@@ -1,7 +1,8 @@
 #import game.model_scripts.game_with_ai as g
 import model.input_data as input
-from game.constants import (GRID_WIDTH, GRID_HEIGHT, EMPIRICAL_MAX_SPEED, ALMOST_COMPLETE_LINES_BLOCK_COUNT)
-from game.blocks import (TETROMINOES_INDEXES, TETROMINOES)
+from game.blocks import TETROMINOES_INDEXES
+from game.board_features import FeatureExtractor
+from game.zobrist import position_key, DROP_DISTANCE_KEYS
 from game.constants import Movement
 from misc.probability_functions import *
 from game.pooling_algorithms import *
@@ -9,49 +10,96 @@ import numpy as np
 # when testing, two modes should be created, for showing and for headless running
 
 class AIController:
-    def __init__(self, model, move_selection_probability_function:ProbabilityFunction):
+    # pooling_pyramid adds area fill ratios after the base inputs (see POOLING_PYRAMID), the network needs input nodes for them
+    # transposition_table (TranspositionTable) caches network outputs by input state, share one only between games of the same model
+    # mask_invalid_actions drops moves the engine would reject (see valid_action_mask) before sampling, so they don't spend the move budget
+    # action_repeat holds every decision for that many ticks (or until the tetromino locks), see decide
+    def __init__(self, model, move_selection_probability_function:ProbabilityFunction, pooling_pyramid=None, transposition_table=None,
+                 mask_invalid_actions=True, action_repeat:int=1):
+        if action_repeat < 1:
+            raise ValueError(f'action_repeat has to be at least 1, got {action_repeat}.')
         self.model = model
         self.probability_function = move_selection_probability_function
-        self.input = input.InputDataExtended(0.0, 0.0, 0.0, 0.0, 0.0, [], 0.0, [], [], [])
+        self.features = FeatureExtractor(pyramid=pooling_pyramid)
+        self.input = input.InputDataObservation(self.features.observation)
+        self.transposition_table = transposition_table
+        self.input_hash = None
+        self.uniforms = None # UniformBuffer over the genome's rng, see get_next_move
+        self.mask_invalid_actions = mask_invalid_actions
+        self.action_mask = None
+        
+        self.action_repeat = action_repeat
+        self.held_move_data = None
+        self.held_ticks_left = 0
+        self.held_piece_index = None
+        self.decision_count = 0 # network evaluations (or table lookups) made, one per decision
+    
+    def decide(self, game):
+        """
+        Return the move data for the current tick.
+        
+        A new decision (features, network, sampling) is made only at decision boundaries: every
+        action_repeat ticks, when a new tetromino spawned, or when the held move would be rejected.
+        In between, the held decision is returned again.
+        
+        Args:
+            game (TetrisEngine): The game being played
+        
+        Returns:
+            dict: Move data, see get_next_move
+        """
+        if (self.held_ticks_left > 0 and game.piece_index == self.held_piece_index
+            and not (self.mask_invalid_actions and not game.valid_action_mask()[self.held_move_data['move']])):
+            self.held_ticks_left -= 1
+            return self.held_move_data
+        
+        self.get_game_data(game)
+        self.held_move_data = self.get_next_move()
+        self.held_ticks_left = self.action_repeat - 1
+        self.held_piece_index = game.piece_index
+        return self.held_move_data
     
-    # this must be normalized!!
+    # this must be normalized!! (the feature extractor does it)
     def get_game_data(self, game):
         current_tetromino = game.current_tetromino
         
-        x, y = current_tetromino.x / float(GRID_WIDTH), current_tetromino.y / float(GRID_HEIGHT)
-        current_shape_idx = TETROMINOES_INDEXES[current_tetromino.shape] / float(len(TETROMINOES_INDEXES))
-        #next_shape_idx = TETROMINOES_INDEXES[game.next_tetromino.shape] / float(len(TETROMINOES_INDEXES))
-        rotation = current_tetromino.rotation / 3.0 # 0 - 3 values 
-        game_speed = game.fall_speed / float(EMPIRICAL_MAX_SPEED)
-        column_heights = game.board.get_column_heights()
-        column_heights_normalized = [column / float(GRID_HEIGHT) for column in column_heights]
-        drop_distance = game.current_drop_distance / float(GRID_HEIGHT)
-        almost_complete_lines = [x * 0.7 for x in game.board.get_almost_complete_lines(ALMOST_COMPLETE_LINES_BLOCK_COUNT)] # 'normalize' to not overwhelm the network with 20 neurons
-        board_state_flattened = [x * 0.1 for x in game.board.get_board_state_flattened()] # 'normalize' to not overwhelm the network with 200 neurons
-        differences = [(column_heights[i] - column_heights[i - 1] / float(GRID_HEIGHT)) for i in range(1, len(column_heights))]
-            
+        # board features only change on lock and line clear
+        self.features.refresh_board(game.board)
+        self.features.write_observation(x=current_tetromino.x, y=current_tetromino.y, 
+                                        shape=TETROMINOES_INDEXES[current_tetromino.shape], 
+                                        rotation=current_tetromino.rotation, 
+                                        drop_distance=game.current_drop_distance
+                                        )
         
+        if self.mask_invalid_actions:
+            self.action_mask = game.valid_action_mask()
         
-        #print(''.join(str(almost_complete_lines)))
-        
-        # value / area_size 
-        #self.input = input.InputData(x, y, current_shape_idx, game.fall_speed, current_tetromino.rotation, next_block_type=next_shape_idx)
-        self.input = input.InputDataExtended(x_block=x, y_block=y, 
-                                             block_type=current_shape_idx, 
-                                             block_fall_speed=game_speed, 
-                                             block_rotation=rotation, 
-                                             columns_normalized=column_heights_normalized, 
-                                             drop_distance=drop_distance, 
-                                             almost_complete_lines=almost_complete_lines,
-                                             board_state=board_state_flattened,
-                                             height_differences_normalized=differences
-                                             )
+        if self.transposition_table is not None:
+            # everything the network sees: the board, the tetromino and the last drop distance
+            self.input_hash = (game.board.zobrist_hash 
+                               ^ position_key(current_tetromino.shape, current_tetromino.rotation, current_tetromino.x, current_tetromino.y) 
+                               ^ DROP_DISTANCE_KEYS[game.current_drop_distance])
     
     def get_next_move(self):
-        outputs = self.model(self.input)
-        probabilities = self.probability_function(outputs)
-        chosen_index = self.model.genome.rng.choice(range(len(probabilities)), replace=False, p=probabilities)
-        chosen_probability = probabilities[chosen_index] if chosen_index < len(probabilities) else 0.0
+        if self.transposition_table is not None:
+            outputs = self.transposition_table.get(self.input_hash)
+            if outputs is None:
+                outputs = self.model(self.input)
+                self.transposition_table.put(self.input_hash, outputs)
+        else:
+            outputs = self.model(self.input)
+        # output node values in node order, which is the Movement order
+        values = np.fromiter(outputs.values(), dtype=np.float64, count=len(outputs))
+        
+        self.decision_count += 1
+        rng = self.model.genome.rng
+        if self.uniforms is None or self.uniforms.rng is not rng:
+            self.uniforms = UniformBuffer(rng)
+        probabilities = self.probability_function(values, rng)
+        if self.action_mask is not None:
+            probabilities = mask_probabilities(probabilities, self.action_mask)
+        chosen_index = int(sample_actions(probabilities, self.uniforms.next()))
+        chosen_probability = probabilities[chosen_index]
         #print('probabilities:' + '-'.join(map(str, probabilities)))
         #print(f'Chosen index: {chosen_index}')
         #print(f"Raw network outputs: {outputs}")
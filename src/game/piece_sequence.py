@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+from game.blocks import TETROMINOES_INDEXES
+from game.constants import PIECE_SEQUENCE_LENGTH, PIECE_SEQUENCE_CACHE_SIZE
+
+# Shape names by piece id, in the same order rng.choice(list(TETROMINOES.keys())) picks them
+SHAPE_NAMES = tuple(TETROMINOES_INDEXES)
+
+class PieceSequence:
+    def __init__(self, seed, length=PIECE_SEQUENCE_LENGTH, pieces=None, shm=None):
+        """
+        The order of tetrominoes for one seed, generated once as a uint8 array of piece ids.
+
+        Drawing the whole sequence with rng.integers(0, 7) gives the same shapes as picking
+        them one by one with rng.choice, so games keep the tetrominoes their seed always had.
+
+        Args:
+            seed (int): Seed the sequence is generated from
+            length (int): Amount of pieces generated up front
+            pieces (np.ndarray, optional): Already generated piece ids (e.g. from shared memory)
+            shm (SharedMemory, optional): Shared memory block backing pieces, kept open while in use
+        """
+        self.seed = seed
+        self._shm = shm
+        self._rng = None
+
+        if pieces is None:
+            self._rng = np.random.default_rng(seed)
+            pieces = self._rng.integers(0, len(SHAPE_NAMES), size=length).astype(np.uint8)
+        self.pieces = pieces
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def shape_at(self, index):
+        """
+        Get the shape of the index-th piece of the game.
+
+        Args:
+            index (int): Position of the piece in the sequence
+
+        Returns:
+            str: Shape type ('I', 'O', 'T', 'S', 'Z', 'J', 'L')
+        """
+        while index >= len(self.pieces):
+            self.extend()
+        return SHAPE_NAMES[self.pieces[index]]
+
+    def extend(self, count=PIECE_SEQUENCE_LENGTH):
+        """
+        Generate the next count pieces, continuing the same random stream.
+
+        Args:
+            count (int): Amount of pieces to add
+        """
+        if self._rng is None:
+            # Attached to a shared sequence, replay the stream up to where it ends
+            self._rng = np.random.default_rng(self.seed)
+            self._rng.integers(0, len(SHAPE_NAMES), size=len(self.pieces))
+
+        more = self._rng.integers(0, len(SHAPE_NAMES), size=count).astype(np.uint8)
+        # The shared block has a fixed size, so the longer sequence becomes a private copy
+        self.pieces = np.concatenate((self.pieces, more))
+
+    def to_shared_memory(self):
+        """
+        Copy the sequence into a new shared memory block.
+
+        The caller owns the block and has to close and unlink it once the workers are done.
+
+        Returns:
+            SharedMemory: Block holding the piece ids, attach to it with attach_shared_sequence
+        """
+        shm = shared_memory.SharedMemory(create=True, size=len(self.pieces))
+        np.ndarray(len(self.pieces), dtype=np.uint8, buffer=shm.buf)[:] = self.pieces
+        return shm
+
+    @staticmethod
+    def from_shared_memory(name, length, seed):
+        """
+        Attach to a sequence another process put in shared memory.
+
+        Args:
+            name (str): Name of the shared memory block
+            length (int): Amount of pieces in the block
+            seed (int): Seed the sequence was generated from
+
+        Returns:
+            PieceSequence: Sequence reading the shared block without copying it
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        pieces = np.ndarray(length, dtype=np.uint8, buffer=shm.buf)
+        return PieceSequence(seed, pieces=pieces, shm=shm)
+
+
+# Sequences already generated in this process, by seed, least recently used first. Games on
+# random seeds would grow it forever, so only the last PIECE_SEQUENCE_CACHE_SIZE are kept
+# (a game holds on to its own sequence, an evicted one is only generated again for new games).
+_SEQUENCES = OrderedDict()
+# Sequences attached to shared memory, never evicted: their block stays open while games read it
+_SHARED_SEQUENCES = {}
+
+def get_piece_sequence(seed):
+    """
+    Get the piece sequence of a seed, generating it on first use in this process.
+
+    Args:
+        seed (int): Game seed
+
+    Returns:
+        PieceSequence: The sequence shared by every game on this seed
+    """
+    sequence = _SHARED_SEQUENCES.get(seed)
+    if sequence is not None:
+        return sequence
+
+    sequence = _SEQUENCES.get(seed)
+    if sequence is None:
+        sequence = PieceSequence(seed)
+        _SEQUENCES[seed] = sequence
+        if len(_SEQUENCES) > PIECE_SEQUENCE_CACHE_SIZE:
+            _SEQUENCES.popitem(last=False)
+    else:
+        _SEQUENCES.move_to_end(seed)
+    return sequence
+
+def attach_shared_sequence(name, length, seed):
+    """
+    Use a sequence from shared memory for every game on seed in this process.
+
+    Meant as a multiprocessing.Pool initializer, so workers read the parent's
+    sequence instead of generating their own.
+
+    Args:
+        name (str): Name of the shared memory block
+        length (int): Amount of pieces in the block
+        seed (int): Seed the sequence was generated from
+    """
+    _SHARED_SEQUENCES[seed] = PieceSequence.from_shared_memory(name, length, seed)
@@ -1,4 +1,9 @@
+import numpy as np
+
 class PoolingAlgorithm:
+    # True if __call__ expects the board's summed-area table instead of its grid
+    uses_summed_area_table = False
+    
     def __call__(self, grid, width, height, x_offset, y_offset):
         raise NotImplementedError("Activation Function is an abstract class with no implementation. Use a child class object.")
 
@@ -33,12 +38,69 @@ class MeanPoolingAlgorithm(PoolingAlgorithm):
     def __call__(self, grid, width, height, x_offset, y_offset):
         #print(f'offset x: {x_offset}, offset y: {y_offset}')
         sum = 0.0
-        for i in range(int(x_offset), int(x_offset + width)):
-            for j in range(int(y_offset), int(y_offset + height)):
-                if (grid[i][j] == None):
+        for i in range(x_offset, x_offset + width):
+            for j in range(y_offset, y_offset + height):
+                if (grid[j][i] == None): # grid is indexed [y][x]
                     #print(f'grid[{i}][{j}] is none.')
                     continue
                 sum += 1
         mean = sum / (width * height) if sum > 0.0 else 0.0
         #print(f'From grid on x: {x_offset} and y: {y_offset} mean: {mean}, sum: {sum}')
-        return mean
\ No newline at end of file
+        return mean
+
+class SummedAreaPoolingAlgorithm(PoolingAlgorithm):
+    uses_summed_area_table = True
+    
+    # same value as MeanPoolingAlgorithm, four lookups in the summed-area table instead of a loop over the area
+    def __call__(self, table, width, height, x_offset, y_offset):
+        x_end = x_offset + width
+        y_end = y_offset + height
+        sum = table[y_end][x_end] - table[y_offset][x_end] - table[y_end][x_offset] + table[y_offset][x_offset]
+        return sum / (width * height) if sum > 0 else 0.0
+
+
+def summed_area_table(occupancy, out=None):
+    """
+    Build the summed-area table of an occupancy plane (or a batch of them).
+
+    table[..., y, x] holds the amount of filled cells above row y and left of column x,
+    so the first row and column are zeros and any rectangle sum takes four lookups.
+
+    Args:
+        occupancy (np.ndarray): (..., GRID_HEIGHT, GRID_WIDTH) 0/1 cells, row 0 is the top
+        out (np.ndarray, optional): (..., GRID_HEIGHT + 1, GRID_WIDTH + 1) integer array to fill
+
+    Returns:
+        np.ndarray: The summed-area table
+    """
+    if out is None:
+        out = np.zeros(occupancy.shape[:-2] + (occupancy.shape[-2] + 1, occupancy.shape[-1] + 1), dtype=np.int64)
+    inner = out[..., 1:, 1:]
+    np.cumsum(occupancy, axis=-2, out=inner)
+    np.cumsum(inner, axis=-1, out=inner)
+    return out
+
+
+def pyramid_areas(levels, width, height):
+    """
+    Split a width x height board into the areas of each pyramid level.
+
+    Args:
+        levels (tuple): (columns, rows) of every level, e.g. ((2, 4), (5, 4), (10, 20))
+        width (int): Board width
+        height (int): Board height
+
+    Returns:
+        tuple: x_start, y_start, x_end, y_end arrays of every area, level by level and row by row
+    """
+    x_start, y_start, x_end, y_end = [], [], [], []
+    for columns, rows in levels:
+        x_edges = np.linspace(0, width, columns + 1).round().astype(np.int64)
+        y_edges = np.linspace(0, height, rows + 1).round().astype(np.int64)
+        for row in range(rows):
+            for col in range(columns):
+                x_start.append(x_edges[col])
+                x_end.append(x_edges[col + 1])
+                y_start.append(y_edges[row])
+                y_end.append(y_edges[row + 1])
+    return np.array(x_start), np.array(y_start), np.array(x_end), np.array(y_end)
@@ -0,0 +1,228 @@
+import pygame
+from game.constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GRID_WIDTH, GRID_HEIGHT,
+    CELL_SIZE, BOARD_OFFSET_X, BOARD_OFFSET_Y, WHITE, BLACK, GRAY
+)
+
+DEFAULT_CONTROLS = [
+    "Controls:",
+    "← → : Move",
+    "↑ : Rotate",
+    "↓ : Soft Drop",
+    "Space : Hard Drop",
+    "P : Pause"
+]
+
+class GameRenderer:
+    def __init__(self, stats_position=(550, 250), mode_label=None, controls=DEFAULT_CONTROLS,
+                 game_over_title="GAME OVER", game_over_hint="Press R to restart"):
+        """
+        Draws a game front-end: board, pieces, next piece preview, statistics and overlays.
+
+        Args:
+            stats_position (tuple): (x, y) of the score, level and lines text
+            mode_label (str, optional): Extra line drawn below the statistics
+            controls (list): Lines of the controls help
+            game_over_title (str): Message shown when the game is over
+            game_over_hint (str): Line shown below the game over message
+        """
+        self.stats_position = stats_position
+        self.mode_label = mode_label
+        self.controls = controls
+        self.game_over_title = game_over_title
+        self.game_over_hint = game_over_hint
+
+        # Load font for text rendering
+        pygame.font.init()
+        self.font = pygame.font.SysFont('Arial', 24)
+        self.large_font = pygame.font.SysFont('Arial', 36)
+
+    def draw(self, screen, game):
+        """
+        Draw the game state.
+
+        Args:
+            screen (pygame.Surface): The screen to draw on
+            game (TetrisEngine): The game to draw
+        """
+        # Draw the board
+        self.draw_board(screen, game.board)
+
+        # Draw the ghost piece
+        self.draw_ghost(screen, game.current_tetromino, game.ghost_y_offset)
+
+        # Draw the current tetromino
+        self.draw_tetromino(screen, game.current_tetromino)
+
+        # Draw the next tetromino preview
+        self.draw_next_tetromino(screen, game)
+
+        # Draw the score, level, and lines cleared
+        self.draw_stats(screen, game)
+
+    def draw_overlays(self, screen, game):
+        """Draw game over or paused message if needed."""
+        if game.game_over:
+            self.draw_game_over(screen)
+        elif game.paused:
+            self.draw_paused(screen)
+
+    def draw_board(self, screen, board):
+        """
+        Draw the board and its contents.
+
+        Args:
+            screen (pygame.Surface): The screen to draw on
+            board (Board): The board to draw
+        """
+        # Draw the board background
+        board_rect = pygame.Rect(
+            BOARD_OFFSET_X - 1,
+            BOARD_OFFSET_Y - 1,
+            GRID_WIDTH * CELL_SIZE + 2,
+            GRID_HEIGHT * CELL_SIZE + 2
+        )
+        pygame.draw.rect(screen, WHITE, board_rect, 2)
+
+        # Draw the grid cells
+        for y in range(GRID_HEIGHT):
+            for x in range(GRID_WIDTH):
+                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
+                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
+                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
+
+                # Draw filled cell or empty cell
+                if board.grid[y][x] is not None:
+                    # If this line is being cleared, flash it
+                    if y in board.lines_to_clear:
+                        if board.clear_animation_counter % 2 == 0:
+                            pygame.draw.rect(screen, WHITE, cell_rect)
+                        else:
+                            pygame.draw.rect(screen, board.grid[y][x], cell_rect)
+                    else:
+                        pygame.draw.rect(screen, board.grid[y][x], cell_rect)
+                    # Draw cell border
+                    pygame.draw.rect(screen, BLACK, cell_rect, 1)
+                else:
+                    # Draw empty cell with slight grid pattern
+                    pygame.draw.rect(screen, BLACK, cell_rect)
+                    pygame.draw.rect(screen, GRAY, cell_rect, 1)
+
+    def draw_tetromino(self, screen, tetromino):
+        """
+        Draw a tetromino on the board.
+
+        Args:
+            screen (pygame.Surface): The screen to draw on
+            tetromino (Tetromino): The tetromino to draw
+        """
+        for x, y in tetromino.get_positions():
+            # Only draw blocks within the visible grid
+            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
+                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
+                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
+                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
+
+                pygame.draw.rect(screen, tetromino.color, cell_rect)
+                pygame.draw.rect(screen, BLACK, cell_rect, 1)
+
+    def draw_ghost(self, screen, tetromino, ghost_y):
+        """
+        Draw the ghost piece (where the tetromino will land).
+
+        Args:
+            screen (pygame.Surface): The screen to draw on
+            tetromino (Tetromino): The current tetromino
+            ghost_y (int): The y-offset for the ghost piece
+        """
+        ghost_positions = [(x, y + ghost_y) for x, y in tetromino.get_positions()]
+
+        for x, y in ghost_positions:
+            # Only draw blocks within the visible grid
+            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
+                cell_x = BOARD_OFFSET_X + x * CELL_SIZE
+                cell_y = BOARD_OFFSET_Y + y * CELL_SIZE
+                cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
+
+                # Draw semi-transparent ghost block
+                ghost_color = (*tetromino.color[:3], 100)  # Transparent version of the color
+                pygame.draw.rect(screen, ghost_color, cell_rect)
+                pygame.draw.rect(screen, BLACK, cell_rect, 1)
+
+    def draw_next_tetromino(self, screen, game):
+        """Draw the next tetromino preview."""
+        # Draw the preview box
+        preview_x = 550
+        preview_y = 100
+        preview_width = 120
+        preview_height = 120
+
+        pygame.draw.rect(screen, WHITE, (preview_x, preview_y, preview_width, preview_height), 2)
+
+        # Draw the label
+        label = self.font.render("Next:", True, WHITE)
+        screen.blit(label, (preview_x, preview_y - 30))
+
+        # Draw the tetromino (centered in the preview box)
+        for x, y in game.next_tetromino.blocks:
+            block_x = preview_x + (preview_width // 2) + x * 20
+            block_y = preview_y + (preview_height // 2) + y * 20
+            pygame.draw.rect(screen, game.next_tetromino.color, (block_x, block_y, 20, 20))
+            pygame.draw.rect(screen, BLACK, (block_x, block_y, 20, 20), 1)
+
+    def draw_stats(self, screen, game):
+        """Draw the game statistics."""
+        stats_x, stats_y = self.stats_position
+
+        # Draw score
+        score_text = self.font.render(f"Score: {game.score}", True, WHITE)
+        screen.blit(score_text, (stats_x, stats_y))
+
+        # Draw level
+        level_text = self.font.render(f"Level: {game.level}", True, WHITE)
+        screen.blit(level_text, (stats_x, stats_y + 30))
+
+        # Draw lines cleared
+        lines_text = self.font.render(f"Lines: {game.lines_cleared}", True, WHITE)
+        screen.blit(lines_text, (stats_x, stats_y + 60))
+
+        # Draw mode status
+        if self.mode_label:
+            mode_text = self.font.render(self.mode_label, True, WHITE)
+            screen.blit(mode_text, (stats_x, stats_y + 90))
+
+        # Draw controls
+        controls_y = 400
+        for i, text in enumerate(self.controls):
+            ctrl_text = self.font.render(text, True, WHITE)
+            screen.blit(ctrl_text, (stats_x, controls_y + i * 25))
+
+    def _draw_dim_overlay(self, screen):
+        # Create a semi-transparent overlay
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        overlay.set_alpha(150)
+        overlay.fill(BLACK)
+        screen.blit(overlay, (0, 0))
+
+    def draw_game_over(self, screen):
+        """Draw the game over message."""
+        self._draw_dim_overlay(screen)
+
+        # Draw game over message
+        game_over_text = self.large_font.render(self.game_over_title, True, WHITE)
+        text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
+        screen.blit(game_over_text, text_rect)
+
+        # Draw restart message
+        restart_text = self.font.render(self.game_over_hint, True, WHITE)
+        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
+        screen.blit(restart_text, restart_rect)
+
+    def draw_paused(self, screen):
+        """Draw the paused message."""
+        self._draw_dim_overlay(screen)
+
+        # Draw paused message
+        paused_text = self.large_font.render("PAUSED", True, WHITE)
+        text_rect = paused_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        screen.blit(paused_text, text_rect)
@@ -0,0 +1,208 @@
+import numpy as np
+from game.blocks import TETROMINOES_INDEXES, ROTATED_TETROMINOES
+from game.board_features import FeatureExtractor, OBSERVATION_SIZE
+from game.constants import (
+    GRID_WIDTH, GRID_HEIGHT, INITIAL_FALL_SPEED, LEVEL_SPEEDUP, POINTS_PER_LINE,
+    HARD_DROP_POINTS, DEFAULT_SEED, Movement
+)
+
+SHAPES = list(TETROMINOES_INDEXES.keys())
+SPAWN_X = 5
+SPAWN_Y = 0
+
+# (shape, rotation, block, (dx, dy)) offsets, shape ids follow TETROMINOES_INDEXES
+PIECE_OFFSETS = np.array(
+    [ROTATED_TETROMINOES[shape] for shape in SHAPES], dtype=np.int64
+)
+# O does not change its rotation state, see Tetromino.rotate
+ROTATES = np.array([shape != 'O' for shape in SHAPES])
+
+# points for 0-4 cleared lines, indexed by the cleared lines count
+LINE_POINTS = np.array([0] + [POINTS_PER_LINE[i] for i in range(1, 5)], dtype=np.int64)
+
+class VecTetris:
+    def __init__(self, num_envs:int, seeds=DEFAULT_SEED):
+        """
+        Run num_envs Tetris games at once, one gravity tick per step for every game.
+
+        Boards are kept as a (num_envs, GRID_HEIGHT, GRID_WIDTH) boolean array and pieces
+        as per game state arrays. Line clears happen immediately on lock.
+
+        Args:
+            num_envs (int): Amount of games
+            seeds (int or list): Seed for every game, or a single seed shared by all of them
+        """
+        self.num_envs = num_envs
+        if np.isscalar(seeds):
+            seeds = [seeds] * num_envs
+        if len(seeds) != num_envs:
+            raise ValueError(f'Expected {num_envs} seeds, got {len(seeds)}.')
+        self.seeds = list(seeds)
+        self._env_ids = np.arange(num_envs)
+        self._rows = np.arange(GRID_HEIGHT)
+        self.features = FeatureExtractor(batch_size=num_envs)
+        self.reset()
+
+    def reset(self):
+        """Start all games from scratch, returns the first observation matrix."""
+        n = self.num_envs
+        self.rngs = [np.random.default_rng(seed) for seed in self.seeds]
+
+        self.boards = np.zeros((n, GRID_HEIGHT, GRID_WIDTH), dtype=bool)
+        self.shape = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.full(n, SPAWN_X, dtype=np.int64)
+        self.y = np.full(n, SPAWN_Y, dtype=np.int64)
+        self.next_shape = np.zeros(n, dtype=np.int64)
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.move_count = np.zeros(n, dtype=np.int64)
+        self.hard_drop_count = np.zeros(n, dtype=np.int64)
+        self.current_drop_distance = np.zeros(n, dtype=np.int64)
+        self.fall_speed = np.full(n, INITIAL_FALL_SPEED / 1000)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        # same draw order as the single games: current piece first, then the next one
+        for i, rng in enumerate(self.rngs):
+            self.shape[i] = rng.integers(0, len(SHAPES))
+            self.next_shape[i] = rng.integers(0, len(SHAPES))
+
+        return self.get_observations()
+
+    def _cells(self, shape, rotation, x, y):
+        """Return (xs, ys) block coordinates with shape (len(idx), 4)."""
+        offsets = PIECE_OFFSETS[shape, rotation]
+        return x[:, None] + offsets[:, :, 0], y[:, None] + offsets[:, :, 1]
+
+    def _is_valid(self, idx, shape, rotation, x, y):
+        """Vectorized Board.is_valid_position for the games in idx."""
+        xs, ys = self._cells(shape, rotation, x, y)
+        inside = (xs >= 0) & (xs < GRID_WIDTH) & (ys < GRID_HEIGHT)
+        on_grid = inside & (ys >= 0)
+        filled = self.boards[idx[:, None], np.clip(ys, 0, GRID_HEIGHT - 1), np.clip(xs, 0, GRID_WIDTH - 1)]
+        return np.all(inside & ~(on_grid & filled), axis=1)
+
+    def _drop_distance(self, idx):
+        """Vectorized Board.get_drop_distance for the current pieces of the games in idx."""
+        xs, ys = self._cells(self.shape[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        # (games, blocks, rows) column occupancy under each block
+        columns = self.boards[idx[:, None, None], self._rows[None, None, :], xs[:, :, None]]
+        below = columns & (self._rows[None, None, :] > ys[:, :, None])
+        first_filled = np.where(below.any(axis=2), below.argmax(axis=2), GRID_HEIGHT)
+        return (first_filled - ys - 1).min(axis=1)
+
+    def _lock(self, idx):
+        """Lock the current pieces of the games in idx, clear lines and spawn the next pieces."""
+        if len(idx) == 0:
+            return
+        xs, ys = self._cells(self.shape[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        overlaps = self.boards[idx[:, None], np.clip(ys, 0, GRID_HEIGHT - 1), xs] & (ys >= 0)
+        over = np.any(ys < 0, axis=1) | np.any(overlaps, axis=1)
+        self.game_over[idx[over]] = True
+
+        placed = ~over
+        idx, xs, ys = idx[placed], xs[placed], ys[placed]
+        if len(idx) == 0:
+            return
+        self.boards[idx[:, None], ys, xs] = True
+
+        # full rows are moved to the top (stable sort keeps the others in order) and emptied
+        full = self.boards[idx].all(axis=2)
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            order = np.argsort(~full, axis=1, kind='stable')
+            boards = np.take_along_axis(self.boards[idx], order[:, :, None], axis=1)
+            boards[self._rows[None, :] < cleared[:, None]] = False
+            self.boards[idx] = boards
+
+            self.score[idx] += LINE_POINTS[cleared] * self.level[idx]
+            self.lines_cleared[idx] += cleared
+            new_level = self.lines_cleared[idx] // 10 + 1
+            level_up = new_level > self.level[idx]
+            self.level[idx[level_up]] = new_level[level_up]
+            self.fall_speed[idx[level_up]] *= LEVEL_SPEEDUP
+
+        self.shape[idx] = self.next_shape[idx]
+        self.rotation[idx] = 0
+        self.x[idx] = SPAWN_X
+        self.y[idx] = SPAWN_Y
+        for i in idx:
+            self.next_shape[i] = self.rngs[i].integers(0, len(SHAPES))
+
+    def step(self, actions):
+        """
+        Apply one action per game followed by one gravity tick.
+
+        Args:
+            actions (array): Movement value for every game, finished games ignore theirs
+
+        Returns:
+            tuple: (observations, score gained this step, game over flags)
+        """
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+        idx = self._env_ids[~self.game_over]
+        act = actions[idx]
+        self.move_count[idx] += 1
+
+        shape, rotation, x, y = self.shape[idx], self.rotation[idx], self.x[idx], self.y[idx]
+
+        dx = np.where(act == Movement.MOVE_LEFT, -1, 0) + np.where(act == Movement.MOVE_RIGHT, 1, 0)
+        moving = dx != 0
+        can_move = self._is_valid(idx, shape, rotation, x + dx, y) & moving
+        self.x[idx[can_move]] += dx[can_move]
+
+        new_rotation = np.where(ROTATES[shape], (rotation + 1) % 4, rotation)
+        rotating = act == Movement.ROTATE
+        can_rotate = self._is_valid(idx, shape, new_rotation, x, y) & rotating
+        self.rotation[idx[can_rotate]] = new_rotation[can_rotate]
+
+        dropping = idx[act == Movement.HARD_DROP]
+        if len(dropping):
+            distance = self._drop_distance(dropping)
+            self.hard_drop_count[dropping] += 1
+            self.current_drop_distance[dropping] = distance
+            self.y[dropping] += distance
+            self.score[dropping] += distance * HARD_DROP_POINTS
+            self._lock(dropping)
+
+        # gravity, games ended by the hard drop stay as they are
+        idx = idx[~self.game_over[idx]]
+        falls = self._is_valid(idx, self.shape[idx], self.rotation[idx], self.x[idx], self.y[idx] + 1)
+        self.y[idx[falls]] += 1
+        self._lock(idx[~falls])
+
+        return self.get_observations(), self.score - score_before, self.game_over.copy()
+
+    def valid_action_masks(self):
+        """
+        Return the (num_envs, len(Movement)) boolean masks of moves that would change the
+        current piece, see TetrisEngine.valid_action_mask. Finished games allow every move.
+        """
+        masks = np.ones((self.num_envs, len(Movement)), dtype=bool)
+        idx = self._env_ids[~self.game_over]
+        shape, rotation, x, y = self.shape[idx], self.rotation[idx], self.x[idx], self.y[idx]
+
+        masks[idx, Movement.MOVE_LEFT] = self._is_valid(idx, shape, rotation, x - 1, y)
+        masks[idx, Movement.MOVE_RIGHT] = self._is_valid(idx, shape, rotation, x + 1, y)
+        masks[idx, Movement.ROTATE] = self._is_valid(idx, shape, (rotation + 1) % 4, x, y) & ROTATES[shape]
+        return masks
+
+    def get_column_heights(self):
+        """Return the (num_envs, GRID_WIDTH) skyline of every board."""
+        filled = self.boards.any(axis=1)
+        return np.where(filled, GRID_HEIGHT - self.boards.argmax(axis=1), 0)
+
+    def get_observations(self):
+        """
+        Return the (num_envs, OBSERVATION_SIZE) normalized network inputs.
+
+        Columns follow the input node order of InputDataExtended.to_dict.
+        """
+        self.features.load_occupancy(self.boards)
+        self.features.extract()
+        observations = self.features.write_observation(self.x, self.y, self.shape, self.rotation, self.current_drop_distance)
+        # the extractor reuses its buffer on the next step
+        return observations.copy()
@@ -0,0 +1,54 @@
+import numpy as np
+from game.blocks import TETROMINOES_INDEXES
+from game.constants import GRID_WIDTH, GRID_HEIGHT
+
+# Zobrist keys, random 64-bit values XORed together into a state hash.
+# Fixed seed so hashes stay the same across processes and runs.
+ZOBRIST_SEED = 0x7E7215
+_rng = np.random.default_rng(ZOBRIST_SEED)
+
+def _keys(*shape):
+    return _rng.integers(0, 2**64, size=shape, dtype=np.uint64).tolist()
+
+# one key per row and row mask, an empty row adds nothing so an empty board hashes to 0
+ROW_KEYS = _keys(GRID_HEIGHT, 1 << GRID_WIDTH)
+for _row in ROW_KEYS:
+    _row[0] = 0
+
+CURRENT_PIECE_KEYS = dict(zip(TETROMINOES_INDEXES, _keys(len(TETROMINOES_INDEXES))))
+NEXT_PIECE_KEYS = dict(zip(TETROMINOES_INDEXES, _keys(len(TETROMINOES_INDEXES))))
+
+# keys for the falling tetromino's position, pivots may sit a few cells outside the grid
+POSITION_MARGIN = 3
+POSITION_KEYS = _keys(len(TETROMINOES_INDEXES), 4, GRID_WIDTH + 2 * POSITION_MARGIN, GRID_HEIGHT + 2 * POSITION_MARGIN)
+DROP_DISTANCE_KEYS = _keys(2 * GRID_HEIGHT)
+
+def board_hash(row_masks):
+    """
+    Hash of a board's occupancy, computed from scratch.
+
+    Args:
+        row_masks (list): Occupancy bitmask of every row
+
+    Returns:
+        int: 64-bit hash
+    """
+    value = 0
+    for y, mask in enumerate(row_masks):
+        value ^= ROW_KEYS[y][mask]
+    return value
+
+def position_key(shape, rotation, x, y):
+    """
+    Key of a tetromino at a position, XOR it into a board hash to hash both.
+
+    Args:
+        shape (str): Shape type
+        rotation (int): Rotation state, 0-3
+        x (int): Pivot x position
+        y (int): Pivot y position
+
+    Returns:
+        int: 64-bit key
+    """
+    return POSITION_KEYS[TETROMINOES_INDEXES[shape]][rotation][x + POSITION_MARGIN][y + POSITION_MARGIN]
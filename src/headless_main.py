@@ -12,7 +12,7 @@ def headless_main(seed, ai_model, max_games=1, max_steps_per_game=10000):
     for game_num in range(max_games):
         print(f"\n=== Game {game_num + 1}/{max_games} ===")
         
-        game = TetrisGameWithAI(seed=seed, ai_model=ai_model)
+        game = TetrisGameWithAI(seed=seed, ai_model=ai_model, instant_line_clears=True, event_driven=True)
         
         steps = 0
         start_time = time.time()
@@ -33,6 +33,7 @@ def headless_main(seed, ai_model, max_games=1, max_steps_per_game=10000):
         print(f"  Level: {game.level}")
         print(f"  Steps: {steps}")
         print(f"  Duration: {duration:.2f} seconds")
+        print(f"  Game time: {game.simulated_time:.2f} seconds")
         print(f"  Game Over: {game.game_over}")
         
         if game.game_over:
@@ -40,8 +41,8 @@ def headless_main(seed, ai_model, max_games=1, max_steps_per_game=10000):
         else:
             print(f"  Reason: Max steps reached")
         
-        if hasattr(game, 'csv_logger'):
-            game.csv_logger.close()
+        if hasattr(game, 'move_logger'):
+            game.move_logger.close()
 
 if __name__ == "__main__":
     import argparse
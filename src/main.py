@@ -1,4 +1,3 @@
-import pygame
 import sys
 #from game.game import TetrisGame
 from game.constants import SCREEN_WIDTH, SCREEN_HEIGHT, TITLE, FPS, DEFAULT_SEED, DEFAULT_SEED_MODEL
@@ -7,9 +6,13 @@ from model.input_data import InputData
 from model.common_genome_data import *
 from game.model_scripts.game_with_ai import *
 from simulation.test_sim import *
-from visualize_moves import *
+
+# pygame and the move visualizer are imported inside the interactive entry points:
+# spawned training workers re-import this module and should not pay for them
 
 def main(seed, ai_model):
+    import pygame
+
     # Initialize pygame
     pygame.init()
     
@@ -63,5 +66,6 @@ if __name__ == "__main__":
     #innovation_db = InnovationDatabase(11) # (input size + output size -1) is the beginning node count
     #main(DEFAULT_SEED, model)
     experiment(common_rates)
+    #from visualize_moves import MoveVisualizer
     #visualizer = MoveVisualizer('logs/ai_moves_seed[42].csv', 42, playback_speed=1)
     #visualizer.run()
\ No newline at end of file
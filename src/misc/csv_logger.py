@@ -1,152 +1,357 @@
 import csv
+import io
 import os
 import time
+import threading
+from collections import Counter, deque
 from datetime import datetime
-from game.constants import CSV_LOG_ENABLED, CSV_LOG_FILENAME, CSV_LOG_DIRECTORY
+from game.constants import (
+    CSV_LOG_ENABLED, CSV_LOG_FILENAME, CSV_LOG_DIRECTORY,
+    CSV_LOG_BUFFER_SIZE, CSV_LOG_FLUSH_SIZE, CSV_LOG_FLUSH_INTERVAL, CSV_LOG_MAX_FILE_SIZE, LOG_COMPRESSION
+)
+from misc.log_files import COMPRESSION_SUFFIXES, compress_frame
+from misc.log_summary import LogSummary, write_summary_sidecar, append_log_index
+
+CSV_HEADER = [
+    'timestamp',
+    'game_time',
+    'move_number',
+    'seed',
+    'move_type',
+    'tetromino_x',
+    'tetromino_y',
+    'tetromino_shape',
+    'tetromino_rotation',
+    'next_shape',
+    'fall_speed',
+    'score',
+    'level',
+    'lines_cleared',
+    'probabilities',
+    'chosen_probability'
+]
+
+def format_csv_row(record, seed, session_start_time):
+    """
+    Turn a raw move record (as CSVLogger.log_move stores it) into a CSV row.
+
+    Args:
+        record (tuple): (log_time, move_number, move_type, tetromino_x, tetromino_y, tetromino_shape,
+            tetromino_rotation, next_shape, fall_speed, score, level, lines_cleared, probabilities, chosen_probability)
+        seed (int, optional): Game seed
+        session_start_time (float): time.time() the log was started at
+
+    Returns:
+        list: Row values following CSV_HEADER
+    """
+    (log_time, move_number, move_type, tetromino_x, tetromino_y, tetromino_shape, tetromino_rotation,
+     next_shape, fall_speed, score, level, lines_cleared, probabilities, chosen_probability) = record
+
+    timestamp = datetime.fromtimestamp(log_time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    game_time = log_time - session_start_time if session_start_time else 0
+    prob_str = ';'.join([f"{p:.4f}" for p in probabilities])
+
+    return [
+        timestamp,
+        f"{game_time:.3f}",
+        move_number,
+        seed if seed is not None else 'unknown',
+        move_type,
+        tetromino_x,
+        tetromino_y,
+        tetromino_shape,
+        tetromino_rotation,
+        next_shape,
+        f"{fall_speed:.3f}",
+        score,
+        level,
+        lines_cleared,
+        prob_str,
+        f"{chosen_probability:.4f}"
+    ]
+
+def new_run_id():
+    """Id grouping the logs of one run (e.g. a training run over many processes), start time plus random suffix."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(2).hex()}"
 
 class CSVLogger:
-    def __init__(self, enabled=CSV_LOG_ENABLED, filename=CSV_LOG_FILENAME, directory=CSV_LOG_DIRECTORY, seed=None):
+    # subclasses with another file format override these, _encode_header and _encode_records
+    extension = '.csv'
+    log_name = 'CSV'
+
+    def __init__(self, enabled=CSV_LOG_ENABLED, filename=CSV_LOG_FILENAME, directory=CSV_LOG_DIRECTORY, seed=None,
+                 buffer_size=CSV_LOG_BUFFER_SIZE, flush_size=CSV_LOG_FLUSH_SIZE, flush_interval=CSV_LOG_FLUSH_INTERVAL,
+                 compression=LOG_COMPRESSION, max_file_size=CSV_LOG_MAX_FILE_SIZE, run_id=None, generation=None,
+                 specimen=None):
+        """
+        Logs AI moves to a CSV file without slowing the game down.
+
+        log_move only stores the raw values in a bounded buffer. A background thread formats
+        and writes them in batches, every flush_interval seconds, as soon as flush_size moves
+        are waiting, and on reset/close. If the writer falls buffer_size moves behind, further
+        moves are dropped (and counted) instead of blocking the game.
+
+        With compression, every written batch becomes an independent gzip member or xz stream
+        appended to the file, readable with open_log while the game is still writing.
+
+        The writer also keeps a LogSummary of what it wrote, saved as the log's summary sidecar
+        when the file is closed, and every log is recorded in the directory's index.jsonl
+        (see misc.log_summary), so analysis does not have to parse it again.
+
+        Files are never overwritten, so any number of processes can log to the same directory:
+        names carry the run id, generation, specimen, process id and seed, plus a number that
+        grows with every file the logger starts (a new game on reset, or the next part once a
+        file reaches max_file_size), and files are created exclusively. The directory's
+        index.jsonl is the manifest, one entry per file with its run, game and part.
+
+        Args:
+            enabled (bool): Write a log at all
+            filename (str): Base file name, the run, process, seed and file number are appended
+            directory (str): Directory of the log files
+            seed (int, optional): Game seed, written to every row
+            buffer_size (int): Moves the buffer holds
+            flush_size (int): Buffered moves that wake the writer early
+            flush_interval (float): Seconds between writes otherwise
+            compression (str, optional): 'gzip', 'lzma' or None, see misc.log_files
+            max_file_size (int, optional): Bytes after which the log continues in a new part, None for no limit
+            run_id (str, optional): Run the log belongs to, new_run_id() if None
+            generation (int, optional): Training generation of the game
+            specimen (int, optional): Index of the evaluated specimen
+        """
         self.enabled = enabled
         self.directory = directory
         self.filename = filename
         self.seed = seed
+        self.run_id = run_id or new_run_id()
+        self.generation = generation
+        self.specimen = specimen
+        self.max_file_size = max_file_size
         self.filepath = None
         self.file_handle = None
         self.csv_writer = None
+        self._text_buffer = None
         self.session_start_time = None
         self.move_count = 0
-        
+        self.summary = None
+        # files started by this logger, the part of the current game (rotation) and its first file
+        self.file_number = 0
+        self.part = 0
+        self.game_filename = None
+
+        self.buffer = deque(maxlen=buffer_size)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dropped_count = 0
+        self.failed_count = 0 # moves in batches the writer could not encode or write
+        self.compression = compression
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer_thread = None
+
         if self.enabled:
             self._setup_logging()
-    
+
     def _setup_logging(self):
-        if not os.path.exists(self.directory):
-            os.makedirs(self.directory)
-        
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_file()
+        print(f"{self.log_name} logging enabled. Saving to: {self.filepath}")
+
+    def _log_filename(self):
         base_name = os.path.splitext(self.filename)[0]
-        
+        extension = self.extension + (COMPRESSION_SUFFIXES[self.compression] if self.compression else '')
+        parts = [base_name, self.run_id]
+        if self.generation is not None:
+            parts.append(f"g{self.generation}")
+        if self.specimen is not None:
+            parts.append(f"s{self.specimen}")
+        parts.append(f"p{os.getpid()}")
         if self.seed is not None:
-            self.filepath = os.path.join(self.directory, f"{base_name}_seed{self.seed}.csv")
-        else:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.filepath = os.path.join(self.directory, f"{base_name}_{timestamp}.csv")
-        
-        self.file_handle = open(self.filepath, 'w', newline='', encoding='utf-8')
-        self.csv_writer = csv.writer(self.file_handle)
-        
-        header = [
-            'timestamp',
-            'game_time',
-            'move_number',
-            'seed',
-            'move_type',
-            'tetromino_x',
-            'tetromino_y', 
-            'tetromino_shape',
-            'tetromino_rotation',
-            'next_shape',
-            'fall_speed',
-            'score',
-            'level',
-            'lines_cleared',
-            'probabilities',
-            'chosen_probability'
-        ]
-        self.csv_writer.writerow(header)
-        self.file_handle.flush()
-        
+            parts.append(f"seed{self.seed}")
+        parts.append(f"{self.file_number:03d}")
+        return '_'.join(parts) + extension
+
+    def _open_file(self):
+        # a new game: its own file, its own start time
         self.session_start_time = time.time()
-        print(f"CSV logging enabled. Saving to: {self.filepath}")
-    
+        self.part = 0
+        self._create_file()
+        self._start_writer()
+
+    def _create_file(self):
+        # exclusive create never truncates a log, a taken name (pid reused within a run) moves on to the next number
+        while True:
+            self.filepath = os.path.join(self.directory, self._log_filename())
+            self.file_number += 1
+            try:
+                self.file_handle = open(self.filepath, 'xb')
+                break
+            except FileExistsError:
+                continue
+
+        filename = os.path.basename(self.filepath)
+        if self.part == 0:
+            self.game_filename = filename
+        self._write_frame(self._encode_header())
+        self.summary = LogSummary(str(self.seed) if self.seed is not None else None, filename)
+        self.summary.offset = self.file_handle.tell()
+        append_log_index(self.directory, filename, event='open', seed=self.seed,
+                         format=self.extension.lstrip('.'), compression=self.compression, run_id=self.run_id,
+                         generation=self.generation, specimen=self.specimen, pid=os.getpid(),
+                         game=self.game_filename, part=self.part)
+
+    def _rotate(self):
+        # called from the writer thread, the game keeps queueing moves meanwhile
+        filepath, file_handle, summary = self.filepath, self.file_handle, self.summary
+        self.part += 1
+        self._create_file()
+        file_handle.close()
+        self._save_summary(filepath, summary)
+
+    def _close_file(self):
+        self._stop_writer()
+        self.file_handle.close()
+        self.file_handle = None
+        self._save_summary(self.filepath, self.summary)
+
+    def _save_summary(self, filepath, summary):
+        try:
+            write_summary_sidecar(filepath, summary)
+        except OSError as e:
+            print(f"Could not write the summary of {filepath}: {e}")
+        append_log_index(self.directory, os.path.basename(filepath), event='close', seed=self.seed,
+                         rows=summary.total_moves, size=summary.offset, dropped=self.dropped_count)
+
+    def _write_frame(self, data):
+        self.file_handle.write(compress_frame(data, self.compression))
+        self.file_handle.flush()
+
+    def _encode_header(self):
+        """Bytes every log file starts with."""
+        return self._encode_rows([CSV_HEADER])
+
+    def _encode_records(self, records):
+        """Bytes of a batch of raw records (see log_move), called from the writer thread."""
+        return self._encode_rows([format_csv_row(record, self.seed, self.session_start_time) for record in records])
+
+    def _encode_rows(self, rows):
+        if self.csv_writer is None:
+            self._text_buffer = io.StringIO(newline='')
+            self.csv_writer = csv.writer(self._text_buffer)
+        self._text_buffer.seek(0)
+        self._text_buffer.truncate()
+        self.csv_writer.writerows(rows)
+        return self._text_buffer.getvalue().encode('utf-8')
+
+    def _start_writer(self):
+        self._stop.clear()
+        self._writer_thread = threading.Thread(target=self._write_loop, name='CSVLoggerWriter', daemon=True)
+        self._writer_thread.start()
+
+    def _stop_writer(self):
+        # the writer empties the buffer before it exits
+        if self._writer_thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._writer_thread.join()
+            self._writer_thread = None
+
+    def _write_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_buffered()
+        self._write_buffered()
+
+    def _write_buffered(self):
+        if not self.buffer:
+            return
+
+        records = []
+        # popleft is atomic, the game thread may keep appending meanwhile
+        while self.buffer:
+            records.append(self.buffer.popleft())
+
+        try:
+            self._write_frame(self._encode_records(records))
+        except Exception as e:
+            # a batch the writer cannot handle must not stop it, every later move would be dropped
+            self.failed_count += len(records)
+            print(f"{self.log_name} log: could not write {len(records)} moves: {e!r}")
+            return
+
+        start_time = self.session_start_time
+        self.summary.update(Counter(record[2] for record in records),
+                            [record[9] for record in records],
+                            [record[0] - start_time for record in records],
+                            [record[13] for record in records])
+        self.summary.offset = self.file_handle.tell()
+        if self.max_file_size and self.summary.offset >= self.max_file_size:
+            self._rotate()
+
     def log_move(self, move_data):
-        if not self.enabled or not self.csv_writer:
+        """
+        Queue a move for the writer thread, never blocks.
+
+        The values are stored as they are and formatted later, so move_data (and its
+        probabilities array) must not be changed after the call.
+        """
+        if not self.enabled or not self.file_handle:
             return
-        
-        current_time = time.time()
-        game_time = current_time - self.session_start_time if self.session_start_time else 0
+
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped_count += 1
+            return
+
         self.move_count += 1
-        
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        move_type = move_data.get('move_type', 'UNKNOWN')
-        tetromino_x = move_data.get('tetromino_x', 0)
-        tetromino_y = move_data.get('tetromino_y', 0)
-        tetromino_shape = move_data.get('tetromino_shape', 'UNKNOWN')
-        tetromino_rotation = move_data.get('tetromino_rotation', 0)
-        next_shape = move_data.get('next_shape', 'UNKNOWN')
-        fall_speed = move_data.get('fall_speed', 0)
-        score = move_data.get('score', 0)
-        level = move_data.get('level', 1)
-        lines_cleared = move_data.get('lines_cleared', 0)
-        probabilities = move_data.get('probabilities', [])
-        chosen_probability = move_data.get('chosen_probability', 0.0)
-        
-        prob_str = ';'.join([f"{p:.4f}" for p in probabilities])
-        
-        row = [
-            timestamp,
-            f"{game_time:.3f}",
+        self.buffer.append((
+            time.time(),
             self.move_count,
-            self.seed if self.seed is not None else 'unknown',
-            move_type,
-            tetromino_x,
-            tetromino_y,
-            tetromino_shape,
-            tetromino_rotation,
-            next_shape,
-            f"{fall_speed:.3f}",
-            score,
-            level,
-            lines_cleared,
-            prob_str,
-            f"{chosen_probability:.4f}"
-        ]
-        
-        self.csv_writer.writerow(row)
-        self.file_handle.flush()
-    
+            move_data.get('move_type', 'UNKNOWN'),
+            move_data.get('tetromino_x', 0),
+            move_data.get('tetromino_y', 0),
+            move_data.get('tetromino_shape', 'UNKNOWN'),
+            move_data.get('tetromino_rotation', 0),
+            move_data.get('next_shape', 'UNKNOWN'),
+            move_data.get('fall_speed', 0),
+            move_data.get('score', 0),
+            move_data.get('level', 1),
+            move_data.get('lines_cleared', 0),
+            move_data.get('probabilities', []),
+            move_data.get('chosen_probability', 0.0)
+        ))
+
+        if len(self.buffer) >= self.flush_size:
+            self._wake.set()
+
+    def flush(self):
+        """Write every buffered move and wait until it is in the file."""
+        if self.file_handle:
+            self._stop_writer()
+            self._start_writer()
+
     def reset(self):
         if not self.enabled:
             return
-            
+
+        # moves of the previous game still go to the old file
         if self.file_handle:
-            self.file_handle.close()
-        
+            self._close_file()
+
         self.move_count = 0
-        self.session_start_time = time.time()
-        
-        self.file_handle = open(self.filepath, 'w', newline='', encoding='utf-8')
-        self.csv_writer = csv.writer(self.file_handle)
-        
-        header = [
-            'timestamp',
-            'game_time',
-            'move_number',
-            'seed',
-            'move_type',
-            'tetromino_x',
-            'tetromino_y', 
-            'tetromino_shape',
-            'tetromino_rotation',
-            'next_shape',
-            'fall_speed',
-            'score',
-            'level',
-            'lines_cleared',
-            'probabilities',
-            'chosen_probability'
-        ]
-        self.csv_writer.writerow(header)
-        self.file_handle.flush()
-        
-        print(f"CSV log reset. Overwriting: {self.filepath}")
+        self.dropped_count = 0
+        self.failed_count = 0
+        self._open_file()
+
+        print(f"{self.log_name} log reset. Saving to: {self.filepath}")
 
     def close(self):
         if self.file_handle:
-            self.file_handle.close()
-            self.file_handle = None
+            self._close_file()
             self.csv_writer = None
             if self.enabled:
-                print(f"CSV log closed. Total moves logged: {self.move_count}")
-    
+                dropped = f", dropped: {self.dropped_count}" if self.dropped_count else ""
+                dropped += f", failed to write: {self.failed_count}" if self.failed_count else ""
+                print(f"{self.log_name} log closed. Total moves logged: {self.move_count}{dropped}")
+
     def __del__(self):
         self.close()
@@ -0,0 +1,83 @@
+import gzip
+import lzma
+
+# Compressed logs are a series of independent frames (gzip members / xz streams), one per
+# written batch, so gzip.open and lzma.open read them back as a single stream, incrementally.
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'lzma': '.xz',
+}
+LOG_EXTENSIONS = ('.csv', '.bin')
+
+def compress_frame(data, compression):
+    """
+    Compress one batch of log bytes into an independent frame.
+
+    Args:
+        data (bytes): Uncompressed bytes
+        compression (str, optional): 'gzip', 'lzma' or None for no compression
+
+    Returns:
+        bytes: The frame, data itself if compression is None
+    """
+    if compression is None:
+        return data
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    if compression == 'lzma':
+        return lzma.compress(data, format=lzma.FORMAT_XZ)
+    raise ValueError(f'Unknown log compression {compression}, use one of {list(COMPRESSION_SUFFIXES)} or None.')
+
+def get_compression(filepath):
+    """Compression of a log file, from its suffix. None for an uncompressed file."""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if filepath.endswith(suffix):
+            return compression
+    return None
+
+def strip_compression_suffix(filepath):
+    """Path without its compression suffix, e.g. ai_moves_seed4.bin.gz -> ai_moves_seed4.bin."""
+    compression = get_compression(filepath)
+    return filepath[:-len(COMPRESSION_SUFFIXES[compression])] if compression else filepath
+
+def is_log_file(filepath):
+    """Check if a file is a move log (CSV or binary, compressed or not)."""
+    return strip_compression_suffix(filepath).endswith(LOG_EXTENSIONS)
+
+def open_log(filepath, mode='rb', **kwargs):
+    """
+    Open a log file for reading, decompressing it on the fly if needed.
+
+    Args:
+        filepath (str): Path of the log
+        mode (str): 'rb' or 'rt'
+        **kwargs: Passed on to the open function (encoding, newline)
+
+    Returns:
+        file: File object reading the uncompressed contents
+    """
+    compression = get_compression(filepath)
+    if compression == 'gzip':
+        return gzip.open(filepath, mode, **kwargs)
+    if compression == 'lzma':
+        return lzma.open(filepath, mode, **kwargs)
+    return open(filepath, mode, **kwargs)
+
+def open_log_stream(file, compression):
+    """
+    Decompress a log from an already open binary file, from its current position.
+
+    Since frames are independent, the position may be any frame boundary, not only the start.
+
+    Args:
+        file (file): Binary file object, positioned at a frame boundary
+        compression (str): 'gzip' or 'lzma'
+
+    Returns:
+        file: Binary file object reading the uncompressed contents
+    """
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if compression == 'lzma':
+        return lzma.LZMAFile(file, 'rb')
+    raise ValueError(f'Unknown log compression {compression}, use one of {list(COMPRESSION_SUFFIXES)}.')
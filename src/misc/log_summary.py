@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from misc.running_statistics import RunningStatistic, QuantileSketch
+
+# A log's summary is kept next to it in <log>.summary.json, with the byte offset it covers, so
+# analysis only parses what was appended since. Every log directory also keeps an append-only
+# index.jsonl with one JSON line per log event (opened, closed), newest entry of a file wins.
+SUMMARY_SUFFIX = '.summary.json'
+SUMMARY_VERSION = 1
+LOG_INDEX_FILENAME = 'index.jsonl'
+
+# bytes at the start of a log hashed to tell it apart from a new log written under the same name
+FINGERPRINT_SIZE = 4096
+
+class LogSummary:
+    def __init__(self, seed=None, filename=None):
+        """
+        Constant-memory summary of one or more move logs, built while streaming their records.
+
+        Summaries of separate logs (e.g. computed in worker processes) combine with merge.
+
+        Args:
+            seed (str, optional): Game seed of the log
+            filename (str, optional): Name of the log file
+        """
+        self.seed = seed
+        self.filenames = [filename] if filename else []
+        self.move_counts = Counter()
+        self.scores = RunningStatistic()
+        self.game_times = RunningStatistic()
+        self.chosen_probabilities = RunningStatistic()
+        self.chosen_probability_sketch = QuantileSketch(0.0, 1.0)
+        # per log values, final score and duration are the maximum of each log
+        self.final_scores = RunningStatistic()
+        self.durations = RunningStatistic()
+        # bytes of a single log file the summary covers, None if unknown (it cannot be resumed)
+        self.offset = None
+
+    @property
+    def total_moves(self):
+        return sum(self.move_counts.values())
+
+    def update(self, move_counts, scores, game_times, chosen_probabilities):
+        """Add a batch of records of the log, columns as arrays."""
+        self.move_counts.update(move_counts)
+        self.scores.add_many(scores)
+        self.game_times.add_many(game_times)
+        self.chosen_probabilities.add_many(chosen_probabilities)
+        self.chosen_probability_sketch.add_many(chosen_probabilities)
+
+    def finish_log(self):
+        """Record the per log values once every record of a single log was added."""
+        if self.scores.count:
+            self.final_scores.add(self.scores.max)
+            self.durations.add(self.game_times.max)
+        return self
+
+    def merge(self, other):
+        self.filenames.extend(other.filenames)
+        self.move_counts.update(other.move_counts)
+        self.scores.merge(other.scores)
+        self.game_times.merge(other.game_times)
+        self.chosen_probabilities.merge(other.chosen_probabilities)
+        self.chosen_probability_sketch.merge(other.chosen_probability_sketch)
+        self.final_scores.merge(other.final_scores)
+        self.durations.merge(other.durations)
+        self.offset = None
+        return self
+
+    def to_dict(self):
+        """Summary of a single, unfinished log as plain values, see write_summary_sidecar."""
+        return {
+            'seed': self.seed,
+            'filename': self.filenames[0] if self.filenames else None,
+            'offset': self.offset,
+            'rows': self.total_moves,
+            'move_counts': dict(self.move_counts),
+            'scores': self.scores.to_dict(),
+            'game_times': self.game_times.to_dict(),
+            'chosen_probabilities': self.chosen_probabilities.to_dict(),
+            'chosen_probability_sketch': self.chosen_probability_sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        summary = cls(values['seed'], values['filename'])
+        summary.offset = values['offset']
+        summary.move_counts.update(values['move_counts'])
+        summary.scores = RunningStatistic.from_dict(values['scores'])
+        summary.game_times = RunningStatistic.from_dict(values['game_times'])
+        summary.chosen_probabilities = RunningStatistic.from_dict(values['chosen_probabilities'])
+        summary.chosen_probability_sketch = QuantileSketch.from_dict(values['chosen_probability_sketch'])
+        return summary
+
+
+def _fingerprint(filepath, size):
+    with open(filepath, 'rb') as file:
+        return hashlib.sha1(file.read(size)).hexdigest()
+
+def write_summary_sidecar(filepath, summary):
+    """
+    Save the summary of a log (before finish_log) next to it, replacing the previous one.
+
+    Args:
+        filepath (str): Path of the log
+        summary (LogSummary): Summary of its first summary.offset bytes
+    """
+    values = summary.to_dict()
+    values['version'] = SUMMARY_VERSION
+    fingerprint_size = min(FINGERPRINT_SIZE, summary.offset or 0)
+    values['fingerprint'] = {'size': fingerprint_size, 'sha1': _fingerprint(filepath, fingerprint_size)}
+
+    # written under another name first, readers never see half a file
+    sidecar_path = filepath + SUMMARY_SUFFIX
+    temporary_path = f'{sidecar_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as file:
+        json.dump(values, file)
+    os.replace(temporary_path, sidecar_path)
+
+def read_summary_sidecar(filepath):
+    """
+    Load the saved summary of a log.
+
+    Returns:
+        LogSummary: The summary, None if there is none, it is unreadable, or it belongs to
+            an earlier file of the same name (or one that has since shrunk)
+    """
+    try:
+        with open(filepath + SUMMARY_SUFFIX, encoding='utf-8') as file:
+            values = json.load(file)
+        if values.get('version') != SUMMARY_VERSION:
+            return None
+        summary = LogSummary.from_dict(values)
+        fingerprint = values['fingerprint']
+        if summary.offset is not None and summary.offset > os.path.getsize(filepath):
+            return None
+        if _fingerprint(filepath, fingerprint['size']) != fingerprint['sha1']:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return summary
+
+def is_summary_sidecar(filepath):
+    return filepath.endswith(SUMMARY_SUFFIX)
+
+
+def append_log_index(directory, filename, **values):
+    """
+    Append an entry about a log to the index of its directory.
+
+    A single short line written with O_APPEND, so processes logging to the same
+    directory do not interleave their entries.
+
+    Args:
+        directory (str): Log directory
+        filename (str): Name of the log file
+        **values: Other fields, e.g. seed, event, rows
+    """
+    entry = {'filename': filename, 'time': time.time(), **values}
+    line = json.dumps(entry) + '\n'
+    with open(os.path.join(directory, LOG_INDEX_FILENAME), 'a', encoding='utf-8') as file:
+        file.write(line)
+
+def read_log_index(directory):
+    """
+    Read the index of a log directory.
+
+    Later entries of a file update the earlier ones, a torn last line is skipped.
+
+    Returns:
+        dict: Merged entry of every indexed filename, in the order the logs were first indexed,
+            None if the directory has no index
+    """
+    index_path = os.path.join(directory, LOG_INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return None
+
+    entries = {}
+    with open(index_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries.setdefault(entry['filename'], {}).update(entry)
+    return entries
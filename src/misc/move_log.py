@@ -0,0 +1,253 @@
+import csv
+import os
+import struct
+import numpy as np
+from datetime import datetime
+from game.blocks import TETROMINOES_INDEXES
+from game.constants import Movement
+from misc.csv_logger import CSVLogger, CSV_HEADER, format_csv_row
+from misc.log_files import get_compression, strip_compression_suffix, open_log
+
+# Binary move log: a fixed size header followed by fixed width records, appended in batches.
+# Records are MOVE_RECORD_DTYPE, so a log is read with one np.fromfile/np.memmap call.
+MOVE_LOG_EXTENSION = '.bin'
+MOVE_LOG_MAGIC = b'TETRMOVE'
+MOVE_LOG_VERSION = 1
+
+# magic, schema version, record size, seed (-1 if unknown), session start time (time.time())
+HEADER_STRUCT = struct.Struct('<8sHHqd4x')
+HEADER_SIZE = HEADER_STRUCT.size
+
+MOVE_NAMES = tuple(move.name for move in Movement)
+SHAPE_NAMES = tuple(TETROMINOES_INDEXES)
+MOVE_INDEXES = {name: index for index, name in enumerate(MOVE_NAMES)}
+
+# log_move fills in 'UNKNOWN' for a move or shape it was not given, stored as this index
+UNKNOWN_NAME = 'UNKNOWN'
+UNKNOWN_INDEX = 0xFF
+
+def move_name(index):
+    """Name of a stored move_type, UNKNOWN_NAME for UNKNOWN_INDEX."""
+    return MOVE_NAMES[index] if index < len(MOVE_NAMES) else UNKNOWN_NAME
+
+def shape_name(index):
+    """Name of a stored tetromino_shape or next_shape, UNKNOWN_NAME for UNKNOWN_INDEX."""
+    return SHAPE_NAMES[index] if index < len(SHAPE_NAMES) else UNKNOWN_NAME
+
+# little endian and packed, the same on every platform
+MOVE_RECORD_DTYPE = np.dtype([
+    ('game_time', '<f4'), # seconds since the session start
+    ('move_number', '<u4'),
+    ('move_type', 'u1'), # Movement value or UNKNOWN_INDEX
+    ('tetromino_shape', 'u1'), # TETROMINOES_INDEXES value or UNKNOWN_INDEX
+    ('next_shape', 'u1'),
+    ('tetromino_rotation', 'u1'),
+    ('tetromino_x', 'i1'),
+    ('tetromino_y', 'i1'),
+    ('level', '<u2'),
+    ('lines_cleared', '<u4'),
+    ('score', '<u4'),
+    ('fall_speed', '<f4'),
+    ('probabilities', '<f4', (len(Movement),)),
+    ('chosen_probability', '<f4'),
+])
+
+class BinaryMoveLogger(CSVLogger):
+    """
+    CSVLogger writing the binary move log format instead, see read_move_log and export_csv.
+
+    Buffering, the writer thread, reset and close work the same, only the records are
+    packed into a structured array per batch instead of being formatted as text.
+    """
+    extension = MOVE_LOG_EXTENSION
+    log_name = 'Binary move'
+
+    def _encode_header(self):
+        return HEADER_STRUCT.pack(MOVE_LOG_MAGIC, MOVE_LOG_VERSION, MOVE_RECORD_DTYPE.itemsize,
+                                  -1 if self.seed is None else self.seed, self.session_start_time)
+
+    def _encode_records(self, records):
+        start_time = self.session_start_time
+        batch = np.array([
+            (log_time - start_time, move_number, MOVE_INDEXES.get(move_type, UNKNOWN_INDEX),
+             TETROMINOES_INDEXES.get(tetromino_shape, UNKNOWN_INDEX), TETROMINOES_INDEXES.get(next_shape, UNKNOWN_INDEX),
+             tetromino_rotation, tetromino_x, tetromino_y, level, lines_cleared,
+             score, fall_speed, probabilities, chosen_probability)
+            for (log_time, move_number, move_type, tetromino_x, tetromino_y, tetromino_shape, tetromino_rotation,
+                 next_shape, fall_speed, score, level, lines_cleared, probabilities, chosen_probability) in records
+        ], dtype=MOVE_RECORD_DTYPE)
+        return batch.tobytes()
+
+
+def read_move_log_header(filepath, file=None):
+    """
+    Read and check the header of a binary move log.
+
+    Args:
+        filepath (str): Path of the log
+        file (file, optional): The log already open with open_log, read from its current position
+
+    Returns:
+        dict: 'version', 'record_size', 'seed' (None if unknown) and 'start_time'
+
+    Raises:
+        ValueError: If the file is not a move log, uses a newer schema or another record size
+    """
+    if file is None:
+        with open_log(filepath, 'rb') as file:
+            data = file.read(HEADER_SIZE)
+    else:
+        data = file.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f'{filepath} is too short for a move log header.')
+
+    magic, version, record_size, seed, start_time = HEADER_STRUCT.unpack(data)
+    if magic != MOVE_LOG_MAGIC:
+        raise ValueError(f'{filepath} is not a binary move log.')
+    if version > MOVE_LOG_VERSION:
+        raise ValueError(f'{filepath} uses move log schema version {version}, this reader supports up to {MOVE_LOG_VERSION}.')
+    if record_size != MOVE_RECORD_DTYPE.itemsize:
+        raise ValueError(f'{filepath} has {record_size} byte records, schema version {version} of this reader '
+                         f'uses {MOVE_RECORD_DTYPE.itemsize} byte records.')
+
+    return {
+        'version': version,
+        'record_size': record_size,
+        'seed': None if seed < 0 else seed,
+        'start_time': start_time,
+    }
+
+def read_move_log(filepath, mmap=True):
+    """
+    Read a binary move log.
+
+    A record cut short (the game was killed mid write) is left out.
+    Compressed logs are decompressed into memory, only uncompressed ones can be mapped.
+
+    Args:
+        filepath (str): Path of the log
+        mmap (bool): Map the records read-only with np.memmap instead of loading them into memory
+
+    Returns:
+        tuple: (header dict, see read_move_log_header, records array of MOVE_RECORD_DTYPE)
+    """
+    if get_compression(filepath):
+        chunks = list(iter_move_log_chunks(filepath))
+        header = chunks[0][0] if chunks else read_move_log_header(filepath)
+        records = np.concatenate([records for _, records in chunks]) if chunks else np.zeros(0, dtype=MOVE_RECORD_DTYPE)
+        return header, records
+
+    header = read_move_log_header(filepath)
+    count = (os.path.getsize(filepath) - HEADER_SIZE) // MOVE_RECORD_DTYPE.itemsize
+    if count == 0:
+        return header, np.zeros(0, dtype=MOVE_RECORD_DTYPE)
+    if mmap:
+        return header, np.memmap(filepath, dtype=MOVE_RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+    return header, np.fromfile(filepath, dtype=MOVE_RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+
+def iter_move_log_chunks(filepath, chunk_size=65536):
+    """
+    Read a binary move log (compressed or not) a chunk of records at a time.
+
+    Only one chunk is decompressed and held in memory at once. A frame or record cut
+    short at the end (the game was killed mid write) ends the log.
+
+    Args:
+        filepath (str): Path of the log
+        chunk_size (int): Records per chunk
+
+    Yields:
+        tuple: (header dict, records array of up to chunk_size records)
+    """
+    chunk_bytes = chunk_size * MOVE_RECORD_DTYPE.itemsize
+    with open_log(filepath, 'rb') as file:
+        header = read_move_log_header(filepath, file)
+        pending = b''
+        while True:
+            try:
+                # read1 decompresses a little at a time, so a torn last frame only loses its own records
+                data = file.read1(chunk_bytes - len(pending))
+            except EOFError:
+                data = b''
+            if not data:
+                break
+            pending += data
+            if len(pending) < chunk_bytes:
+                continue
+            yield header, np.frombuffer(pending, dtype=MOVE_RECORD_DTYPE)
+            pending = b''
+
+        count = len(pending) // MOVE_RECORD_DTYPE.itemsize
+        if count:
+            yield header, np.frombuffer(pending[:count * MOVE_RECORD_DTYPE.itemsize], dtype=MOVE_RECORD_DTYPE)
+
+def iter_move_records(header, records):
+    """
+    Yield the records of a binary log as raw records, in the form CSVLogger.log_move stores them.
+    """
+    start_time = header['start_time']
+    for record in records.tolist():
+        (game_time, move_number, move_type, tetromino_shape, next_shape, tetromino_rotation, tetromino_x,
+         tetromino_y, level, lines_cleared, score, fall_speed, probabilities, chosen_probability) = record
+        yield (start_time + game_time, move_number, move_name(move_type), tetromino_x, tetromino_y,
+               shape_name(tetromino_shape), tetromino_rotation, shape_name(next_shape), fall_speed,
+               score, level, lines_cleared, probabilities, chosen_probability)
+
+def export_csv(filepath, csv_filepath=None):
+    """
+    Convert a binary move log to the CSV format CSVLogger writes.
+
+    Args:
+        filepath (str): Path of the binary log
+        csv_filepath (str, optional): Output path, defaults to the log path with a .csv extension
+
+    Returns:
+        str: Path of the written CSV file
+    """
+    if csv_filepath is None:
+        csv_filepath = os.path.splitext(strip_compression_suffix(filepath))[0] + '.csv'
+
+    with open(csv_filepath, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        for header, records in iter_move_log_chunks(filepath):
+            writer.writerows(format_csv_row(record, header['seed'], header['start_time'])
+                             for record in iter_move_records(header, records))
+    return csv_filepath
+
+def is_move_log(filepath):
+    """Check by extension if a log file is a binary move log (otherwise it is CSV), compressed or not."""
+    return strip_compression_suffix(filepath).endswith(MOVE_LOG_EXTENSION)
+
+def load_move_dicts(filepath):
+    """
+    Read the moves of a binary log as the dicts MoveVisualizer replays (CSV_HEADER keys, parsed values).
+
+    Returns:
+        list: One dict per move
+    """
+    header, records = read_move_log(filepath, mmap=False)
+    seed = str(header['seed']) if header['seed'] is not None else 'unknown'
+    moves = []
+    for record in iter_move_records(header, records):
+        (log_time, move_number, move_type, tetromino_x, tetromino_y, tetromino_shape, tetromino_rotation,
+         next_shape, fall_speed, score, level, lines_cleared, probabilities, chosen_probability) = record
+        moves.append({
+            'timestamp': datetime.fromtimestamp(log_time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            'game_time': log_time - header['start_time'],
+            'move_number': move_number,
+            'seed': seed,
+            'move_type': move_type,
+            'tetromino_x': tetromino_x,
+            'tetromino_y': tetromino_y,
+            'tetromino_shape': tetromino_shape,
+            'tetromino_rotation': tetromino_rotation,
+            'next_shape': next_shape,
+            'fall_speed': fall_speed,
+            'score': score,
+            'level': level,
+            'lines_cleared': lines_cleared,
+            'probabilities': probabilities,
+            'chosen_probability': chosen_probability
+        })
+    return moves
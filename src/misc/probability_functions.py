@@ -1,28 +1,116 @@
-import math
 import numpy as np
 
+# Probability functions turn network outputs into action probabilities. They take a vector of
+# output values, or an (N, actions) batch of them, and return probabilities of the same shape.
+
 class ProbabilityFunction:
-    def __call__(self, values):
+    def __call__(self, values, rng=None):
         raise NotImplementedError('ProbabilityFunction is an abstract class with no implementation. Use a child class object.')
-    
+
 class Softmax(ProbabilityFunction):
-    def __call__(self, values):
-        total = sum(math.exp(number) for number in values)
-        return [math.exp(number) / total for number in values]
-    
+    def __call__(self, values, rng=None):
+        values = np.asarray(values, dtype=np.float64)
+        # log-sum-exp: shifting by the max keeps exp from overflowing and does not change the result
+        if values.ndim == 1:
+            exp = np.exp(values - values.max())
+            return exp / exp.sum()
+        exp = np.exp(values - values.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
 class TemperatureProb(ProbabilityFunction):
-    def __call__(self, values):
-        epsilon = 0.3  # 30% random exploration
-        output_values = values
-    
-        if np.random.random() < epsilon:
-            # Random action
-            return [0.2, 0.2, 0.2, 0.2, 0.2]  # Uniform
-        else:
-            # Greedy action (choose best)
-            best_action = np.argmax(output_values)
-            probs = [0.05, 0.05, 0.05, 0.05, 0.05]  # Small prob for others
-            probs[best_action] = 0.8  # High prob for best
+    def __init__(self, epsilon:float=0.3, best_probability:float=0.8):
+        self.epsilon = epsilon  # 30% random exploration
+        self.best_probability = best_probability
+
+    def __call__(self, values, rng=None):
+        values = np.asarray(values, dtype=np.float64)
+        if rng is None:
+            rng = np.random.default_rng()
+        action_count = values.shape[-1]
+
+        if values.ndim == 1:
+            if rng.random() < self.epsilon:
+                # Random action
+                return np.full(action_count, 1.0 / action_count)  # Uniform
+            # Greedy action (choose best), small prob for others
+            probs = np.full(action_count, (1.0 - self.best_probability) / (action_count - 1))
+            probs[values.argmax()] = self.best_probability
             return probs
-        
-        
\ No newline at end of file
+
+        probs = np.full(values.shape, (1.0 - self.best_probability) / (action_count - 1))
+        np.put_along_axis(probs, values.argmax(axis=-1)[..., None], self.best_probability, axis=-1)
+        explore = rng.random(values.shape[:-1]) < self.epsilon
+        probs[explore] = 1.0 / action_count
+        return probs
+
+
+class UniformBuffer:
+    def __init__(self, rng, size:int=1024):
+        """
+        Uniform [0, 1) numbers drawn from rng in blocks, handed out one (or a few) at a time.
+
+        Args:
+            rng (np.random.Generator): Source of the numbers, e.g. the genome's rng
+            size (int): Amount drawn at once
+        """
+        self.rng = rng
+        self.size = size
+        self.values = rng.random(size)
+        self.position = 0
+
+    def next(self, count:int=None):
+        """
+        Take the next number, or the next count numbers as an array.
+        """
+        needed = 1 if count is None else count
+        if self.position + needed > self.size:
+            self.values = self.rng.random(max(self.size, needed))
+            self.position = 0
+        start = self.position
+        self.position += needed
+        if count is None:
+            return self.values[start]
+        return self.values[start:self.position]
+
+
+def mask_probabilities(probabilities, mask):
+    """
+    Zero the probabilities of masked out actions and renormalize over the rest.
+
+    Rows that would be left with nothing split evenly between their allowed actions.
+
+    Args:
+        probabilities (np.ndarray): (actions,) or (N, actions) probabilities
+        mask (np.ndarray): Boolean array of the same shape, True for allowed actions
+
+    Returns:
+        np.ndarray: New array of masked probabilities
+    """
+    masked = np.where(mask, probabilities, 0.0)
+    total = masked.sum(axis=-1, keepdims=True)
+    empty = total <= 0.0
+    if empty.any():
+        masked = np.where(empty, mask, masked).astype(np.float64)
+        total = masked.sum(axis=-1, keepdims=True)
+    return masked / total
+
+def sample_actions(probabilities, uniforms):
+    """
+    Pick actions by inverse CDF: the first action whose cumulative probability exceeds the uniform.
+
+    Probabilities do not have to sum to 1, they are scaled by their total.
+
+    Args:
+        probabilities (np.ndarray): (actions,) or (N, actions) probabilities
+        uniforms (float or np.ndarray): One uniform [0, 1) number per row
+
+    Returns:
+        int or np.ndarray: Chosen action index of every row
+    """
+    cdf = np.cumsum(probabilities, axis=-1)
+    if cdf.ndim == 1:
+        return min(int(cdf.searchsorted(uniforms * cdf[-1], side='right')), len(cdf) - 1)
+    thresholds = np.asarray(uniforms)[..., None] * cdf[..., -1:]
+    chosen = (cdf <= thresholds).sum(axis=-1)
+    # guards against rounding pushing the threshold past the last action
+    return np.minimum(chosen, cdf.shape[-1] - 1)
@@ -0,0 +1,173 @@
+from collections import deque
+import numpy as np
+
+class RunningStatistic:
+    def __init__(self, window_size:int=None):
+        """
+        Constant-memory accumulator of a stream of values.
+
+        Args:
+            window_size (int, optional): Keep the last window_size values for windowed queries. No history is kept if None.
+        """
+        self.window_size = window_size
+        self.window = deque(maxlen=window_size) if window_size else None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._squared_diff_sum = 0.0 # Welford's M2
+        if self.window is not None:
+            self.window.clear()
+
+    def add(self, value):
+        self.count += 1
+        # Welford's update, avoids summing the whole stream
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._squared_diff_sum += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if self.window is not None:
+            self.window.append(value)
+
+    def add_many(self, values):
+        """
+        Add a batch of values at once (e.g. a column of a log chunk).
+
+        Args:
+            values (np.ndarray): The values
+        """
+        values = np.asarray(values)
+        if len(values) == 0:
+            return
+        batch = RunningStatistic()
+        batch.count = len(values)
+        batch.mean = float(values.mean(dtype=np.float64))
+        batch._squared_diff_sum = float(((values - batch.mean) ** 2).sum())
+        # keep the value type, e.g. int scores stay ints
+        batch.min = values.min().item()
+        batch.max = values.max().item()
+        self.merge(batch)
+
+        if self.window is not None:
+            self.window.extend(values[-self.window_size:].tolist())
+
+    def merge(self, other):
+        """
+        Combine the statistics of another stream into this one, as if its values were added here.
+
+        Windows are not merged, the window of self is kept as it is.
+
+        Args:
+            other (RunningStatistic): Statistics of the other stream
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self._squared_diff_sum = other.count, other.mean, other._squared_diff_sum
+            self.min, self.max = other.min, other.max
+            return
+
+        # Chan et al. pairwise update of Welford's values
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._squared_diff_sum += other._squared_diff_sum + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        """Plain values of the statistic (without the window), e.g. for a JSON file."""
+        return {'count': self.count, 'mean': self.mean, 'min': self.min, 'max': self.max, 'm2': self._squared_diff_sum}
+
+    @classmethod
+    def from_dict(cls, values):
+        statistic = cls()
+        statistic.count, statistic.mean = values['count'], values['mean']
+        statistic.min, statistic.max = values['min'], values['max']
+        statistic._squared_diff_sum = values['m2']
+        return statistic
+
+    @property
+    def variance(self):
+        return self._squared_diff_sum / self.count if self.count > 1 else 0.0
+
+    @property
+    def window_mean(self):
+        if not self.window:
+            return 0.0
+        return sum(self.window) / float(len(self.window))
+
+    def __str__(self):
+        return f'RunningStatistic(count: {self.count}, mean: {self.mean:.4f}, min: {self.min}, max: {self.max})'
+
+
+class QuantileSketch:
+    def __init__(self, low:float=0.0, high:float=1.0, bins:int=10000):
+        """
+        Constant-memory quantile estimate of a stream of values in [low, high].
+
+        Values are counted in equal width bins, so quantiles are exact up to the bin
+        width ((high - low) / bins) and sketches of separate streams merge by adding counts.
+        Values outside the range are counted in the first or last bin.
+
+        Args:
+            low (float): Lower end of the value range
+            high (float): Upper end of the value range
+            bins (int): Number of bins
+        """
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def add(self, value):
+        self.add_many([value])
+
+    def add_many(self, values):
+        bins = len(self.counts)
+        indexes = ((np.asarray(values, dtype=np.float64) - self.low) * (bins / (self.high - self.low))).astype(np.int64)
+        np.clip(indexes, 0, bins - 1, out=indexes)
+        self.counts += np.bincount(indexes, minlength=bins)
+
+    def merge(self, other):
+        """Add the counts of a sketch with the same range and bins."""
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError('Only sketches with the same range and bins can be merged.')
+        self.counts += other.counts
+
+    def to_dict(self):
+        """Range and the non-empty bins, e.g. for a JSON file."""
+        nonzero = np.flatnonzero(self.counts)
+        return {'low': self.low, 'high': self.high, 'bins': len(self.counts),
+                'counts': dict(zip(nonzero.tolist(), self.counts[nonzero].tolist()))}
+
+    @classmethod
+    def from_dict(cls, values):
+        sketch = cls(values['low'], values['high'], values['bins'])
+        for index, count in values['counts'].items():
+            sketch.counts[int(index)] = count
+        return sketch
+
+    def quantile(self, q:float):
+        """
+        Estimate the q-quantile (0.5 for the median), None if no values were added.
+        """
+        total = self.count
+        if total == 0:
+            return None
+        # the bin holding the value of rank q * (total - 1), reported as its middle
+        index = int(np.searchsorted(np.cumsum(self.counts), q * (total - 1), side='right'))
+        width = (self.high - self.low) / len(self.counts)
+        return self.low + (min(index, len(self.counts) - 1) + 0.5) * width
@@ -100,4 +100,12 @@ class InputDataExtended:
         #        
         #for i, value in enumerate(self.board_state):
         #    dict[dict_len + i] = value
-        return dict
\ No newline at end of file
+        return dict
+        
+# same inputs as InputDataExtended, read from a FeatureExtractor observation vector
+class InputDataObservation:
+    def __init__(self, observation):
+        self.observation = observation # updated in place by the feature extractor
+        
+    def to_dict(self):
+        return dict(enumerate(self.observation.tolist()))
@@ -6,10 +6,9 @@ from simulation.sim_constants import (FITNESS_MULITPLIER_LC, HARD_DROP_COUNT_PEN
                                       HEIGHT_PENALTY_MULTIPLIER, GAME_OVER_PENALTY, POSITIONING_BONUS_MULTIPLIER, NUM_THREADS)
 from game.model_scripts.game_with_ai import TetrisGameWithAI
 from game.constants import DEFAULT_SEED, FPS, ALMOST_COMPLETE_LINES_BLOCK_COUNT
+from game.piece_sequence import get_piece_sequence, attach_shared_sequence
 from model.genome import InnovationDatabase
-from misc.visualizers import visualize_phenotype, draw_diagrams
 import numpy as np
-import pygame
 import sys
 import time
 import threading
@@ -23,7 +22,7 @@ class ExpSpecimen:
         self.model = model
 
 class Experiment:
-    def __init__(self, iteration_count:int, population_size:int, tournament_size:int, elite_size_percent:float, enable_pruning:bool, prune_percent: float, stagnation_mean_percent: float, common_rates:CommonRates):
+    def __init__(self, iteration_count:int, population_size:int, tournament_size:int, elite_size_percent:float, enable_pruning:bool, prune_percent: float, stagnation_mean_percent: float, common_rates:CommonRates, action_repeat:int=1):
         self.iteration_count = iteration_count
         self.population_size = population_size
         self.tournament_size = tournament_size
@@ -32,6 +31,7 @@ class Experiment:
         self.enable_pruning = enable_pruning
         self.prune_percent = prune_percent
         self.stagnation_threshold = stagnation_mean_percent
+        self.action_repeat = action_repeat # ticks every AI decision is held for, see AIController.decide
         self.rng = np.random.default_rng()
 
     def tournament_selection(self, population):
@@ -46,8 +46,8 @@ class Experiment:
         return winner
         
     def __call__(self):
-        # Initialize pygame
-        pygame.init()    
+        # Plotting pulls in matplotlib and networkx, only the parent process needs it
+        from misc.visualizers import visualize_phenotype, draw_diagrams
         
         corrected_size = self.population_size - 1
         
@@ -84,218 +84,229 @@ class Experiment:
         num_processes = min(mp.cpu_count(), NUM_THREADS if 'NUM_THREADS' in globals() else mp.cpu_count())
         print(f"Using {num_processes} processes for multiprocessing")
         
-        max_move_count = 100
-        while (current_iteration <= self.iteration_count):
-            print(f'Current iteration: {current_iteration}')
-            #print(f'Best specimen was {best_specimen.fitness}')
-            # run test (headless) for each and set fitness
+        # Every specimen plays the same seed, generate its pieces once and let the workers read them
+        piece_sequence = get_piece_sequence(DEFAULT_SEED)
+        piece_sequence_shm = piece_sequence.to_shared_memory()
+        piece_sequence_args = (piece_sequence_shm.name, len(piece_sequence), DEFAULT_SEED)
+        
+        # the block has to go even if training stops early (an error, Ctrl-C), it outlives the process otherwise
+        try:
+            max_move_count = 100
+            while (current_iteration <= self.iteration_count):
+                print(f'Current iteration: {current_iteration}')
+                #print(f'Best specimen was {best_specimen.fitness}')
+                # run test (headless) for each and set fitness
             
-            fitnessSumPerIt = 0.0
-            runtimeSum_s_PerIt = 0.0
-            clearedLinesPerIt = 0.0
-            hard_drops = 0
-            moves = 0
+                fitnessSumPerIt = 0.0
+                runtimeSum_s_PerIt = 0.0
+                clearedLinesPerIt = 0.0
+                hard_drops = 0
+                moves = 0
+                decisions = 0
             
-            if (current_iteration % 50 == 0):
-                max_move_count += 100
+                if (current_iteration % 50 == 0):
+                    max_move_count += 100
                 
-            args_list = [
-                (specimen, DEFAULT_SEED, max_move_count, FPS, self._calculate_fitness) for specimen in population
-            ]
+                args_list = [
+                    (specimen, DEFAULT_SEED, max_move_count, FPS, self._calculate_fitness, self.action_repeat) for specimen in population
+                ]
             
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                try:
+                    with mp.Pool(processes=num_processes, initializer=attach_shared_sequence, initargs=piece_sequence_args) as pool:
+                        print(f'Evaluating {len(population)} specimens using {num_processes} processes...')
                     
-            try:
-                with mp.Pool(processes=num_processes) as pool:
-                    print(f'Evaluating {len(population)} specimens using {num_processes} processes...')
+                        # Use pool.map to process all specimens
+                        results_list = pool.map(_evaluate_specimen_mp, args_list)
                     
-                    # Use pool.map to process all specimens
-                    results_list = pool.map(_evaluate_specimen_mp, args_list)
+                        # Process results
+                        for specimen, results in results_list:
+                            # Update iteration statistics
+                            fitnessSumPerIt += results['fitness']
+                            runtimeSum_s_PerIt += results['runtime']
+                            clearedLinesPerIt += results['lines_cleared']
+                            hard_drops += results['hard_drop_count']
+                            moves += results['move_count']
+                            decisions += results['decision_count']
+                        
+                            # Check for new records
+                            if max_lines_cleared < results['lines_cleared']:
+                                max_lines_cleared = results['lines_cleared']
+                                iteration_for_lines = current_iteration
+                            
+                            if results['fitness'] > best_fitness_ever:
+                                best_fitness_ever = results['fitness']
+                                best_specimen = specimen
+                                print(f'Best specimen changed fitness to: {best_specimen.fitness}')
+                        
+                            print(f'Specimen evaluated - Fitness: {results["fitness"]:.2f}, '
+                                f'Lines: {results["lines_cleared"]}, Runtime: {results["runtime"]:.2f}s')
+                    
+                        for i, (specimen, _) in enumerate(results_list):
+                            population[i] = specimen
+                        
+                except Exception as e:
+                    print(f"Error in multiprocessing: {e}")
+                    print("Falling back to sequential processing...")
+                    for i, specimen in enumerate(population):
+                        specimen, results = _evaluate_specimen_mp(args_list[i])
+                        population[i] = specimen
                     
-                    # Process results
-                    for specimen, results in results_list:
-                        # Update iteration statistics
                         fitnessSumPerIt += results['fitness']
                         runtimeSum_s_PerIt += results['runtime']
                         clearedLinesPerIt += results['lines_cleared']
                         hard_drops += results['hard_drop_count']
                         moves += results['move_count']
-                        
-                        # Check for new records
+                        decisions += results['decision_count']
+                    
                         if max_lines_cleared < results['lines_cleared']:
                             max_lines_cleared = results['lines_cleared']
                             iteration_for_lines = current_iteration
-                            
+                        
                         if results['fitness'] > best_fitness_ever:
                             best_fitness_ever = results['fitness']
                             best_specimen = specimen
                             print(f'Best specimen changed fitness to: {best_specimen.fitness}')
-                        
-                        print(f'Specimen evaluated - Fitness: {results["fitness"]:.2f}, '
-                            f'Lines: {results["lines_cleared"]}, Runtime: {results["runtime"]:.2f}s')
-                    
-                    for i, (specimen, _) in enumerate(results_list):
-                        population[i] = specimen
-                        
-            except Exception as e:
-                print(f"Error in multiprocessing: {e}")
-                print("Falling back to sequential processing...")
-                for i, specimen in enumerate(population):
-                    specimen, results = _evaluate_specimen_mp(args_list[i])
-                    population[i] = specimen
-                    
-                    fitnessSumPerIt += results['fitness']
-                    runtimeSum_s_PerIt += results['runtime']
-                    clearedLinesPerIt += results['lines_cleared']
-                    hard_drops += results['hard_drop_count']
-                    moves += results['move_count']
-                    
-                    if max_lines_cleared < results['lines_cleared']:
-                        max_lines_cleared = results['lines_cleared']
-                        iteration_for_lines = current_iteration
-                        
-                    if results['fitness'] > best_fitness_ever:
-                        best_fitness_ever = results['fitness']
-                        best_specimen = specimen
-                        print(f'Best specimen changed fitness to: {best_specimen.fitness}')
             
-            avg_fitness = fitnessSumPerIt / fl_popSize
-            move_count_percent = hard_drops / float(moves) if moves > 0 else 0
-            mean_hard_drop_percent.append(move_count_percent)
-            avg_time = runtimeSum_s_PerIt / fl_popSize
-            avg_linesCleared = clearedLinesPerIt / fl_popSize
-            mean_fitnesses.append(avg_fitness)
+                avg_fitness = fitnessSumPerIt / fl_popSize
+                move_count_percent = hard_drops / float(moves) if moves > 0 else 0
+                mean_hard_drop_percent.append(move_count_percent)
+                avg_time = runtimeSum_s_PerIt / fl_popSize
+                avg_linesCleared = clearedLinesPerIt / fl_popSize
+                mean_fitnesses.append(avg_fitness)
             
-            print(f'Mean fitness: {avg_fitness}, iteration: {current_iteration}')
-            print(f'Mean moves per game: {moves / fl_popSize}, iteration: {current_iteration}')
+                print(f'Mean fitness: {avg_fitness}, iteration: {current_iteration}')
+                print(f'Mean moves per game: {moves / fl_popSize}, iteration: {current_iteration}')
+                print(f'Mean decisions per game: {decisions / fl_popSize} (action repeat {self.action_repeat}), iteration: {current_iteration}')
             
-            mean_runtime.append(avg_time)
-            mean_clearedLines.append(avg_linesCleared)
+                mean_runtime.append(avg_time)
+                mean_clearedLines.append(avg_linesCleared)
             
-            # overwrite diagrams per iteration
-            draw_diagrams(
-                generations=self.iteration_count, mean_scores=mean_fitnesses, 
-                mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines,
-                best_fitness=best_specimen.fitness, pop_size=self.population_size, 
-                common_rates=self.common_rates, fps_recordered=FPS, 
-                max_lines=max_lines_cleared, iteration_lines=iteration_for_lines
-            )
+                # overwrite diagrams per iteration
+                draw_diagrams(
+                    generations=self.iteration_count, mean_scores=mean_fitnesses, 
+                    mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines,
+                    best_fitness=best_specimen.fitness, pop_size=self.population_size, 
+                    common_rates=self.common_rates, fps_recordered=FPS, 
+                    max_lines=max_lines_cleared, iteration_lines=iteration_for_lines,
+                    action_repeat=self.action_repeat
+                )
             
-            """ for specimen in population:
-                #print(f'Specimen {current_pop}')
-                current_pop += 1
-                game = TetrisGameWithAI(seed=DEFAULT_SEED, ai_model=specimen.model)
-                start = time.time() # will be in seconds I guess
-                while (not game.game_over):
-                    for event in pygame.event.get():
-                        if event.type == pygame.QUIT:
-                            pygame.quit()
-                            sys.exit()
-                        elif event.type == pygame.KEYDOWN:
-                            game.handle_input(event.key)
-                    game.update()
-                    clock.tick(FPS)
-                    if game.move_count >= max_move_count:
-                        print('Time is up')
-                        break
-                runtime = time.time() - start
-                runtimeSum_s_PerIt += runtime
-                #print(f'This game ran for: {runtime} with {game.move_count} moves.')
-                clearedLinesPerIt += game.lines_cleared
-                almost_cleared = game.board.get_almost_complete_lines(ALMOST_COMPLETE_LINES_BLOCK_COUNT).count(1)
-                avg_height = game.final_average_board_height
-                specimen.fitness =  self._calculate_fitness(game.score, game.lines_cleared, game.move_count, game.hard_drop_count, 
-                                                            almost_cleared_lines_count=almost_cleared, average_board_height=avg_height, is_game_over=game.game_over)
+                """ for specimen in population:
+                    #print(f'Specimen {current_pop}')
+                    current_pop += 1
+                    game = TetrisGameWithAI(seed=DEFAULT_SEED, ai_model=specimen.model)
+                    start = time.time() # will be in seconds I guess
+                    while (not game.game_over):
+                        for event in pygame.event.get():
+                            if event.type == pygame.QUIT:
+                                pygame.quit()
+                                sys.exit()
+                            elif event.type == pygame.KEYDOWN:
+                                game.handle_input(event.key)
+                        game.update()
+                        clock.tick(FPS)
+                        if game.move_count >= max_move_count:
+                            print('Time is up')
+                            break
+                    runtime = time.time() - start
+                    runtimeSum_s_PerIt += runtime
+                    #print(f'This game ran for: {runtime} with {game.move_count} moves.')
+                    clearedLinesPerIt += game.lines_cleared
+                    almost_cleared = game.board.get_almost_complete_lines(ALMOST_COMPLETE_LINES_BLOCK_COUNT).count(1)
+                    avg_height = game.final_average_board_height
+                    specimen.fitness =  self._calculate_fitness(game.score, game.lines_cleared, game.move_count, game.hard_drop_count, 
+                                                                almost_cleared_lines_count=almost_cleared, average_board_height=avg_height, is_game_over=game.game_over)
                    
-                #print(f'Game score: {game.score}. Fitness: {specimen.fitness}.')
-                #specimen.fitness = game.score
-                #print(f'Specimen finess: {specimen.fitness}')
-                fitnessSumPerIt += specimen.fitness
+                    #print(f'Game score: {game.score}. Fitness: {specimen.fitness}.')
+                    #specimen.fitness = game.score
+                    #print(f'Specimen finess: {specimen.fitness}')
+                    fitnessSumPerIt += specimen.fitness
                 
-                if max_lines_cleared < game.lines_cleared:
-                    max_lines_cleared = game.lines_cleared
-                    iteration_for_lines = current_iteration
+                    if max_lines_cleared < game.lines_cleared:
+                        max_lines_cleared = game.lines_cleared
+                        iteration_for_lines = current_iteration
                 
-                hard_drops += game.hard_drop_count
-                moves += game.move_count
-                if (specimen.fitness > best_fitness_ever):
-                    best_fitness_ever = specimen.fitness
-                    best_specimen = specimen
-                    print(f'Best specimen changed fitness to: {best_specimen.fitness}')
+                    hard_drops += game.hard_drop_count
+                    moves += game.move_count
+                    if (specimen.fitness > best_fitness_ever):
+                        best_fitness_ever = specimen.fitness
+                        best_specimen = specimen
+                        print(f'Best specimen changed fitness to: {best_specimen.fitness}')
             
-            avg_fitness = fitnessSumPerIt / fl_popSize
-            move_count_percent = hard_drops / float(moves)
-            mean_hard_drop_percent.append(move_count_percent)
-            avg_time = runtimeSum_s_PerIt / fl_popSize
-            avg_linesCleared = clearedLinesPerIt / fl_popSize
-            mean_fitnesses.append(avg_fitness)
-            print(f'Mean fitness: {avg_fitness}, iteration: {current_iteration}')
-            print(f'Mean moves per game: {moves / fl_popSize}, iteration: {current_iteration}')
-            mean_runtime.append(avg_time)
-            mean_clearedLines.append(avg_linesCleared)
+                avg_fitness = fitnessSumPerIt / fl_popSize
+                move_count_percent = hard_drops / float(moves)
+                mean_hard_drop_percent.append(move_count_percent)
+                avg_time = runtimeSum_s_PerIt / fl_popSize
+                avg_linesCleared = clearedLinesPerIt / fl_popSize
+                mean_fitnesses.append(avg_fitness)
+                print(f'Mean fitness: {avg_fitness}, iteration: {current_iteration}')
+                print(f'Mean moves per game: {moves / fl_popSize}, iteration: {current_iteration}')
+                mean_runtime.append(avg_time)
+                mean_clearedLines.append(avg_linesCleared)
                         
-            # overwrite diagrams per iteration
-            draw_diagrams(generations=self.iteration_count,mean_scores=mean_fitnesses, mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines, 
-                          best_fitness=best_specimen.fitness, pop_size=self.population_size, common_rates=self.common_rates, 
-                          fps_recordered=FPS, max_lines=max_lines_cleared, iteration_lines=iteration_for_lines) """
+                # overwrite diagrams per iteration
+                draw_diagrams(generations=self.iteration_count,mean_scores=mean_fitnesses, mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines, 
+                              best_fitness=best_specimen.fitness, pop_size=self.population_size, common_rates=self.common_rates, 
+                              fps_recordered=FPS, max_lines=max_lines_cleared, iteration_lines=iteration_for_lines) """
             
             
-            sorted_population = sorted(population, key=lambda x: x.fitness, reverse=True)
+                sorted_population = sorted(population, key=lambda x: x.fitness, reverse=True)
             
-            if sorted_population[0].fitness > best_specimen.fitness:
-                best_specimen = population[0]
+                if sorted_population[0].fitness > best_specimen.fitness:
+                    best_specimen = population[0]
                 
-            next_population = [None] * corrected_size
+                next_population = [None] * corrected_size
 
-            # elitism
-            elite_size = int(self.elite_size_percent * self.population_size)
-            for i in range(0, elite_size):
-                next_population[i] = self._copy_specimen(sorted_population[i])                
+                # elitism
+                elite_size = int(self.elite_size_percent * self.population_size)
+                for i in range(0, elite_size):
+                    next_population[i] = self._copy_specimen(sorted_population[i])                
                         
             
-            # tournament selection and crossover
-            for i in range(elite_size, corrected_size):
-                parent1 = self.tournament_selection(sorted_population)
+                # tournament selection and crossover
+                for i in range(elite_size, corrected_size):
+                    parent1 = self.tournament_selection(sorted_population)
                 
-                if self.rng.random() < self.common_rates.crossover_rate:
-                    parent2 = self.tournament_selection(sorted_population)
-                    while parent2 == parent1:
+                    if self.rng.random() < self.common_rates.crossover_rate:
                         parent2 = self.tournament_selection(sorted_population)
+                        while parent2 == parent1:
+                            parent2 = self.tournament_selection(sorted_population)
 
-                    genome1 = parent1.model.genome
-                    genome2 = parent2.model.genome
-                    fitness1 = parent1.fitness
-                    fitness2 = parent2.fitness
+                        genome1 = parent1.model.genome
+                        genome2 = parent2.model.genome
+                        fitness1 = parent1.fitness
+                        fitness2 = parent2.fitness
 
-                    child_genome = genome1.crossover(genome2, fitness1, fitness2)
-                else:
-                    # if no crossover, just clone better parent - just clone the one selected
-                    #if parent1.fitness >= parent2.fitness:
-                    #    child_genome = parent1.model.genome.copy()
-                    #else:
-                    #    child_genome = parent2.model.genome.copy()
-                    child_genome = parent1.model.genome.copy()
+                        child_genome = genome1.crossover(genome2, fitness1, fitness2)
+                    else:
+                        # if no crossover, just clone better parent - just clone the one selected
+                        #if parent1.fitness >= parent2.fitness:
+                        #    child_genome = parent1.model.genome.copy()
+                        #else:
+                        #    child_genome = parent2.model.genome.copy()
+                        child_genome = parent1.model.genome.copy()
 
-                child_model = Model(genome=child_genome, previous_network_fitness=0)
-                next_population[i] = ExpSpecimen(child_model, 0)
+                    child_model = Model(genome=child_genome, previous_network_fitness=0)
+                    next_population[i] = ExpSpecimen(child_model, 0)
 
-            # mutation for each except elitism
-            for specimen in next_population[elite_size:]:
-                self._apply_mutations(specimen)
+                # mutation for each except elitism
+                for specimen in next_population[elite_size:]:
+                    self._apply_mutations(specimen)
             
-            population = next_population
-            current_iteration += 1
+                population = next_population
+                current_iteration += 1
         
-        print(f'Best fitness is: {best_specimen.fitness}')
-        print(f'Mean hard drop percent of moves: {sum(mean_hard_drop_percent)/self.iteration_count}')
-        draw_diagrams(generations=self.iteration_count,
-                      mean_scores=mean_fitnesses, mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines, 
-                      best_fitness=best_specimen.fitness, pop_size=self.population_size, common_rates=self.common_rates, 
-                      fps_recordered=FPS, max_lines=max_lines_cleared, iteration_lines=iteration_for_lines)
-        #visualize_phenotype(best_specimen.model.genome)
+            print(f'Best fitness is: {best_specimen.fitness}')
+            print(f'Mean hard drop percent of moves: {sum(mean_hard_drop_percent)/self.iteration_count}')
+            draw_diagrams(generations=self.iteration_count,
+                          mean_scores=mean_fitnesses, mean_runtimes=mean_runtime, mean_clearedLines=mean_clearedLines, 
+                          best_fitness=best_specimen.fitness, pop_size=self.population_size, common_rates=self.common_rates, 
+                          fps_recordered=FPS, max_lines=max_lines_cleared, iteration_lines=iteration_for_lines,
+                          action_repeat=self.action_repeat)
+            #visualize_phenotype(best_specimen.model.genome)
+        finally:
+            piece_sequence_shm.close()
+            piece_sequence_shm.unlink()
         
     def _calculate_fitness(self, score, lines_cleared, moves_count, hard_drop_count, almost_cleared_lines_count, average_board_height, is_game_over):
         base = score + (lines_cleared * FITNESS_MULITPLIER_LC)
@@ -340,7 +351,10 @@ class Experiment:
         return ExpSpecimen(copied_model, specimen.fitness)
     
     def _evaluate_specimen(self, specimen, seed, max_move_count, fps, calculate_fitness_func):
-        game = TetrisGameWithAI(seed=seed, ai_model=specimen.model)
+        import pygame
+
+        game = TetrisGameWithAI(seed=seed, ai_model=specimen.model, instant_line_clears=True, event_driven=True,
+                                action_repeat=self.action_repeat)
         clock = pygame.time.Clock()
         
         start = time.time()
@@ -372,13 +386,16 @@ class Experiment:
             'hard_drop_count': game.hard_drop_count,
             'move_count': game.move_count,
             'score': game.score,
-            'fitness': fitness
+            'fitness': fitness,
+            'simulated_time': game.simulated_time,
+            'decision_count': game.ai_controller.decision_count
         }
         
 def _evaluate_specimen_mp(args):
-    specimen, seed, max_move_count, fps, calculate_fitness_func = args
+    specimen, seed, max_move_count, fps, calculate_fitness_func, action_repeat = args
         
-    game = TetrisGameWithAI(seed=seed, ai_model=specimen.model)
+    game = TetrisGameWithAI(seed=seed, ai_model=specimen.model, instant_line_clears=True, event_driven=True,
+                            action_repeat=action_repeat)
         
     start_time = time.time()
         
@@ -407,7 +424,9 @@ def _evaluate_specimen_mp(args):
         'lines_cleared': game.lines_cleared,
         'hard_drop_count': game.hard_drop_count,
         'move_count': game.move_count,
-        'score': game.score
+        'score': game.score,
+        'simulated_time': game.simulated_time,
+        'decision_count': game.ai_controller.decision_count
         }
         
     return specimen, results
\ No newline at end of file
@@ -5,13 +5,14 @@ from model.common_genome_data import CommonRates
 from game.model_scripts.game_headless import TetrisGameHeadless
 from game.model_scripts.ai_controller import AIController
 from misc.probability_functions import Softmax
+from misc.csv_logger import new_run_id
 
-def train_single_instance(seed, max_steps=1000):
+def train_single_instance(seed, max_steps=1000, run_id=None, generation=None, specimen=None):
     common_rates = CommonRates(0.8, 0.1, 0.4, 0.2, 0.6, 5)
     innovation_db = InnovationDatabase()
     model = Model.generate_network(input_size=6, output_size=6, common_rates=common_rates, innovation_db=innovation_db)
 
-    game = TetrisGameHeadless(seed=seed, ai_model=model)
+    game = TetrisGameHeadless(seed=seed, ai_model=model, run_id=run_id, generation=generation, specimen=specimen)
     
     steps = 0
     while not game.game_over and steps < max_steps:
@@ -23,8 +24,8 @@ def train_single_instance(seed, max_steps=1000):
     return {'seed': seed, 'score': game.score, 'lines_cleared': game.lines_cleared, 'steps': steps}
 
 def train_wrapper(args):
-    seed, max_steps = args
-    return train_single_instance(seed, max_steps)
+    seed, max_steps, run_id, generation, specimen = args
+    return train_single_instance(seed, max_steps, run_id, generation, specimen)
 
 def main():
     num_workers = multiprocessing.cpu_count() - 1
@@ -36,9 +37,12 @@ def main():
     print(f"Max {max_steps_per_game} steps per game")
     
     seeds = list(range(num_workers))
-    args_list = [(seed, max_steps_per_game) for seed in seeds]
+    # every worker writes its own move logs, named by run, generation and specimen
+    run_id = new_run_id()
+    print(f"Run id: {run_id}")
     
     for generation in range(max_generations):
+        args_list = [(seed, max_steps_per_game, run_id, generation, specimen) for specimen, seed in enumerate(seeds)]
         with multiprocessing.Pool(processes=num_workers) as pool:
             results = pool.map(train_wrapper, args_list)
         
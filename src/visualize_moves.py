@@ -6,6 +6,9 @@ import argparse
 import os
 from game.model_scripts.game_replay import TetrisGameReplay
 from game.constants import SCREEN_WIDTH, SCREEN_HEIGHT, TITLE, FPS
+from misc.move_log import MOVE_LOG_EXTENSION, is_move_log, load_move_dicts
+from misc.log_files import COMPRESSION_SUFFIXES, is_log_file, open_log
+from misc.log_summary import read_log_index
 
 class MoveVisualizer:
     def __init__(self, csv_file_path, seed=None, playback_speed=1.0):
@@ -55,7 +58,11 @@ class MoveVisualizer:
             print(f"Error: CSV file {self.csv_file_path} not found")
             return
         
-        with open(self.csv_file_path, 'r', encoding='utf-8') as file:
+        if is_move_log(self.csv_file_path):
+            self.moves_data = load_move_dicts(self.csv_file_path)
+            return
+        
+        with open_log(self.csv_file_path, 'rt', encoding='utf-8', newline='') as file:
             reader = csv.DictReader(file)
             for row in reader:
                 move_data = {
@@ -94,16 +101,8 @@ class MoveVisualizer:
         move_data = self.moves_data[self.current_move_index]
         
         from game.constants import Movement
-        move_mapping = {
-            'MOVE_LEFT': Movement.MOVE_LEFT,
-            'MOVE_RIGHT': Movement.MOVE_RIGHT,
-            'ROTATE': Movement.ROTATE,
-            'SOFT_DROP': Movement.SOFT_DROP,
-            'HARD_DROP': Movement.HARD_DROP,
-            'NO_MOVE': Movement.NO_MOVE
-        }
-        
-        move_type = move_mapping.get(move_data['move_type'], Movement.NO_MOVE)
+        # moves that no longer exist (SOFT_DROP in old logs) are replayed as NO_MOVE
+        move_type = Movement.__members__.get(move_data['move_type'], Movement.NO_MOVE)
         
         ai_move_data = {
             'move': move_type,
@@ -216,15 +215,26 @@ class MoveVisualizer:
 
 def find_csv_file(seed):
     logs_dir = "logs"
+    # newest indexed game of the seed, from its first part (a replay starts at the first move)
+    index = read_log_index(logs_dir) or {}
+    for entry in sorted(index.values(), key=lambda entry: entry['time'], reverse=True):
+        if entry.get('seed') == seed and entry.get('part', 0) == 0:
+            filepath = os.path.join(logs_dir, entry['filename'])
+            if os.path.exists(filepath):
+                return filepath
+    
+    # logs from before the index
     possible_names = [
+        f"ai_moves_seed{seed}{MOVE_LOG_EXTENSION}",
         f"ai_moves_seed{seed}.csv",
         f"ai_moves_seed[{seed}].csv"
     ]
     
     for name in possible_names:
-        filepath = os.path.join(logs_dir, name)
-        if os.path.exists(filepath):
-            return filepath
+        for suffix in ('',) + tuple(COMPRESSION_SUFFIXES.values()):
+            filepath = os.path.join(logs_dir, name + suffix)
+            if os.path.exists(filepath):
+                return filepath
     
     return None
 
@@ -234,7 +244,7 @@ def list_available_logs():
         print("No logs directory found")
         return []
     
-    csv_files = [f for f in os.listdir(logs_dir) if f.endswith('.csv') and 'ai_moves' in f]
+    csv_files = [f for f in os.listdir(logs_dir) if is_log_file(f) and 'ai_moves' in f]
     return sorted(csv_files)
 
 def main():